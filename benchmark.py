@@ -0,0 +1,310 @@
+"""Бенчмарк движков проверки на локальной имитации Fragment.
+
+    python -m benchmark --engines threads,async,pipeline --concurrency 5,15,50 --requests 500
+    python -m benchmark --output bench_new.json --compare bench_old.json
+
+Каждое сочетание движка и параллелизма гоняется в свежем процессе со
+своим MockFragmentServer (тоже отдельным процессом, чтобы его CPU не
+смешивался с клиентским): считаются проверки/сек, p50/p95/p99 задержки,
+загрузка CPU и пиковая память именно этого прогона. Итог сохраняется в JSON.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from generator import UsernameGenerator
+from keyspace import KeyspaceEnumerator
+from parser import FragmentParser
+from proxies import ProxyPool
+from results import ResultBatch
+
+# Каталог модулей: дочерние процессы запускаются через -m из него
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def make_usernames(count: int) -> List[str]:
+    """Одни и те же имена во всех прогонах и версиях: перебор с фиксированным зерном"""
+    return KeyspaceEnumerator(5, seed=0).next_batch(count)
+
+
+class ListGenerator:
+    """Генератор для конвейера, выдающий ровно заданный список имен"""
+
+    def __init__(self, usernames: List[str]):
+        self.pending = list(usernames)
+
+    def sweep_finished(self, category: str) -> bool:
+        return not self.pending
+
+    def generate_batch(self, count: int, category: str = "5char") -> List[str]:
+        batch, self.pending = self.pending[:count], self.pending[count:]
+        return batch
+
+    def clear_used_usernames(self):
+        pass
+
+    def mark_checked(self, usernames):
+        pass
+
+
+def run_threads(fragment: FragmentParser, usernames: List[str], concurrency: int) -> List[Dict]:
+    return fragment.check_usernames_batch(usernames, max_workers=concurrency)
+
+
+def run_async(fragment: FragmentParser, usernames: List[str], concurrency: int) -> List[Dict]:
+    async def collect():
+        return [result async for result in fragment.check_usernames_async(usernames, concurrency=concurrency)]
+    return asyncio.run(collect())
+
+
+def run_pipeline(fragment: FragmentParser, usernames: List[str], concurrency: int) -> List[Dict]:
+    from pipeline import CheckPipeline
+
+    results: List[Dict] = []
+    pipeline = CheckPipeline(ListGenerator(usernames), fragment, category="5char", workers=concurrency,
+                             on_result=results.append)
+    pipeline.start()
+    while not pipeline.finished:
+        time.sleep(0.01)
+    pipeline.stop()
+    pipeline.join(2)
+    return results
+
+
+ENGINES = {
+    'threads': run_threads,
+    'async': run_async,
+    'pipeline': run_pipeline,
+}
+
+
+@contextlib.contextmanager
+def mock_server(server_args: List[str]):
+    """Запускает mock_fragment отдельным процессом и отдает его адрес"""
+    process = subprocess.Popen([sys.executable, "-m", "mock_fragment", "--port", "0", *server_args],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, cwd=HERE)
+    try:
+        yield process.stdout.readline().strip()
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def bench_engine(engine: str, concurrency: int, requests_count: int, server_args: List[str],
+                 proxies: int = 0) -> Dict:
+    usernames = make_usernames(requests_count)
+    with contextlib.ExitStack() as stack:
+        urls = [stack.enter_context(mock_server(server_args)) for _ in range(max(1, proxies))]
+        if proxies:
+            # Каждая заглушка - отдельный исходящий прокси со своим лимитом;
+            # целевой адрес не резолвится, отвечают сами прокси
+            fragment = FragmentParser(base_url="http://fragment.test", proxies=ProxyPool(urls))
+        else:
+            fragment = FragmentParser(base_url=urls[0])
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        results = ENGINES[engine](fragment, usernames, concurrency)
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        pool = fragment.pool_stats()
+        fragment.close()
+        server_stats: Dict[str, int] = {}
+        for url in urls:
+            with urllib.request.urlopen(url + '/__stats') as response:
+                for key, value in json.load(response).items():
+                    server_stats[key] = server_stats.get(key, 0) + value
+
+    batch = ResultBatch(results)
+    p50, p95, p99 = batch.latency_quantiles((0.50, 0.95, 0.99))
+    return {
+        'kind': 'engine',
+        'engine': engine,
+        'concurrency': concurrency,
+        'proxies': proxies,
+        'requests': len(results),
+        'wall_seconds': round(wall, 3),
+        'checks_per_sec': round(len(results) / wall, 1) if wall else 0,
+        'success_rate': round(batch.success_count / len(batch), 4) if len(batch) else 0,
+        'latency_p50': p50,
+        'latency_p95': p95,
+        'latency_p99': p99,
+        'cpu_seconds': round(cpu, 3),
+        'cpu_percent': round(100 * cpu / wall, 1) if wall else 0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'connections_opened': pool['connections'],
+        'server': server_stats,
+    }
+
+
+def bench_engine_isolated(engine: str, concurrency: int, requests_count: int, server_args: List[str],
+                          proxies: int = 0, log_level: str = "WARNING") -> Dict:
+    """bench_engine в отдельном процессе: ru_maxrss - пик только этого прогона,
+    а не максимум по всем предыдущим"""
+    output = subprocess.check_output(
+        [sys.executable, "-m", "benchmark", "--single-engine", engine, "--concurrency", str(concurrency),
+         "--requests", str(requests_count), "--proxies", str(proxies), "--log-level", log_level, *server_args],
+        text=True, cwd=HERE)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_generator(category: str, count: int, sweep: bool) -> Dict:
+    generator = UsernameGenerator()
+    generator.set_sweep_mode(sweep)
+    produced = 0
+    start = time.perf_counter()
+    while produced < count:
+        batch = generator.generate_batch(min(1000, count - produced), category)
+        if not batch:
+            break
+        produced += len(batch)
+    wall = time.perf_counter() - start
+    return {
+        'kind': 'generator',
+        'category': category,
+        'sweep': sweep,
+        'generated': produced,
+        'names_per_sec': round(produced / wall, 1) if wall else 0,
+    }
+
+
+def bench_scorer(count: int) -> Dict:
+    from scoring import ValueScorer
+
+    generator = UsernameGenerator()
+    scorer = ValueScorer(dictionary=generator.popular_words)
+    names = make_usernames(count)
+    start = time.perf_counter()
+    scorer.score_batch(names)
+    wall = time.perf_counter() - start
+    return {
+        'kind': 'scorer',
+        'scored': len(names),
+        'names_per_sec': round(len(names) / wall, 1) if wall else 0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: List[Dict], baseline_file: str):
+    """Печатает изменения относительно сохраненного прогона"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    old = {(r['engine'], r['concurrency']): r for r in baseline['results'] if r['kind'] == 'engine'}
+
+    print(f"\n📐 Сравнение с {baseline_file} ({baseline['meta'].get('revision')})")
+    for row in current:
+        if row['kind'] != 'engine':
+            continue
+        before = old.get((row['engine'], row['concurrency']))
+        if not before:
+            continue
+        speed = (row['checks_per_sec'] / before['checks_per_sec'] - 1) * 100 if before['checks_per_sec'] else 0
+        print(f"   {row['engine']:>8} x{row['concurrency']:<4} "
+              f"{before['checks_per_sec']:>8.1f} -> {row['checks_per_sec']:>8.1f} проверок/сек ({speed:+.1f}%) | "
+              f"p95 {before['latency_p95']:.2f} -> {row['latency_p95']:.2f}с")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Бенчмарк проверки юзернеймов")
+    parser.add_argument("--engines", default="threads,async,pipeline")
+    parser.add_argument("--concurrency", default="5,15,50")
+    parser.add_argument("--requests", type=int, default=500, help="проверок на один прогон")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--distribution", choices=["lognormal", "uniform", "constant"], default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=30000)
+    parser.add_argument("--proxies", type=int, default=0,
+                        help="гонять потоковые движки через N локальных прокси-заглушек (каждая со своим --throttle)")
+    parser.add_argument("--generator-count", type=int, default=20000,
+                        help="сколько имен генерировать в бенчмарке генератора (0 - пропустить)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", default=None, help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--log-level", default="WARNING",
+                        help="уровень журнала движков (по умолчанию только предупреждения)")
+    # Внутренний режим: один прогон движка, строка результата - JSON в stdout
+    parser.add_argument("--single-engine", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    from logs import setup_logging
+    setup_logging(args.log_level)
+
+    server_args = [
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--distribution", args.distribution, "--error-rate", str(args.error_rate),
+        "--throttle", str(args.throttle), "--page-size", str(args.page_size),
+    ]
+    if args.single_engine:
+        row = bench_engine(args.single_engine, int(args.concurrency), args.requests, server_args, args.proxies)
+        print(json.dumps(row, ensure_ascii=False))
+        return 0
+
+    results: List[Dict] = []
+
+    for engine in args.engines.split(','):
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            if args.proxies and engine == 'async':
+                print("⚠️ async-движок не ходит через прокси, пропускаем", file=sys.stderr)
+                break
+            row = bench_engine_isolated(engine, concurrency, args.requests, server_args,
+                                        args.proxies, args.log_level)
+            results.append(row)
+            print(f"🚀 {engine:>8} x{concurrency:<4} {row['checks_per_sec']:>8.1f} проверок/сек | "
+                  f"p50 {row['latency_p50']:.2f} p95 {row['latency_p95']:.2f} p99 {row['latency_p99']:.2f}с | "
+                  f"CPU {row['cpu_percent']:.0f}% | RSS {row['peak_rss_mb']:.0f} МБ | "
+                  f"соединений {row['connections_opened']}", file=sys.stderr)
+
+    if args.generator_count:
+        for category, sweep in (("4char", False), ("4char", True), ("5char", True), ("english", False)):
+            row = bench_generator(category, args.generator_count, sweep)
+            results.append(row)
+            print(f"🎲 {category:>8} {'sweep' if sweep else 'random':>6} "
+                  f"{row['names_per_sec']:>10.1f} имен/сек ({row['generated']} шт.)", file=sys.stderr)
+        row = bench_scorer(args.generator_count)
+        results.append(row)
+        print(f"⚖️  оценка ценности {row['names_per_sec']:>10.1f} имен/сек", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'options': vars(args),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"💾 Сохранено в {args.output}", file=sys.stderr)
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Консольный режим без tkinter для серверов и контейнеров.
+
+Пример: python -m cli --category 4char --workers 30 --rate 20 --output hits.jsonl
+Наблюдение: python -m cli --watch taken.txt --watch-interval 600 --rate 5 --output changes.jsonl
+"""
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import List, Optional
+
+logger = logging.getLogger("cli")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m cli",
+        description="Проверка доступности юзернеймов на Fragment без графического интерфейса",
+    )
+    parser.add_argument("--category", choices=["4char", "5char", "english"], default="4char",
+                        help="категория юзернеймов (по умолчанию 4char)")
+    parser.add_argument("--workers", type=int, default=15,
+                        help="число одновременных проверок (по умолчанию 15)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="подбирать параллелизм автоматически (AIMD), --workers - максимум")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="целевой темп, проверок/сек (0 - без лимита)")
+    parser.add_argument("--output", default=None,
+                        help="файл результатов: JSONL, или CSV по расширению .csv ('-' - stdout)")
+    parser.add_argument("--all-results", action="store_true",
+                        help="писать все результаты, а не только свободные имена")
+    parser.add_argument("--output-max-mb", type=float, default=100,
+                        help="ротация файла результатов после N МБ (0 - без ротации)")
+    parser.add_argument("--sweep", action="store_true",
+                        help="полный перебор 4/5-символьных имен без повторов")
+    parser.add_argument("--sweep-state", default=None,
+                        help="файл для сохранения и продолжения позиции перебора и словаря (--wordlist)")
+    parser.add_argument("--prioritize", action="store_true",
+                        help="проверять сначала самые ценные имена (словарные, произносимые, с повторами)")
+    parser.add_argument("--lookahead", type=int, default=5000,
+                        help="из скольких ожидающих кандидатов выбирать лучший при --prioritize")
+    parser.add_argument("--dictionary", default=None,
+                        help="файл слов (по одному на строку) для оценки ценности")
+    parser.add_argument("--wordlist", default=None,
+                        help="словарь для категории english: текст (индекс .idx строится рядом) или готовый .idx")
+    parser.add_argument("--word-prefix", default="",
+                        help="брать из словаря только слова с этим префиксом")
+    parser.add_argument("--watch", default=None,
+                        help="режим наблюдения: перепроверять имена из файла и сообщать о смене статуса")
+    parser.add_argument("--watch-interval", type=float, default=3600,
+                        help="интервал перепроверки имени по умолчанию, сек")
+    parser.add_argument("--watch-save-interval", type=float, default=300,
+                        help="как часто сохранять состояние наблюдения (файл .state), сек")
+    parser.add_argument("--db", default=None,
+                        help="SQLite-хранилище результатов (пропуск недавно проверенных)")
+    parser.add_argument("--ttl", type=float, default=24 * 3600,
+                        help="не перепроверять имена моложе TTL секунд (по умолчанию сутки)")
+    parser.add_argument("--sessions", type=int, default=1,
+                        help="на сколько HTTP-сессий делить нагрузку (пул делится между ними)")
+    parser.add_argument("--proxies", default=None,
+                        help="файл со списком прокси (http://, socks5://), по одному на строку")
+    parser.add_argument("--proxy-rate", type=float, default=0,
+                        help="лимит проверок/сек через один прокси (0 - без лимита)")
+    parser.add_argument("--base-url", default="https://fragment.com",
+                        help="адрес Fragment (для тестового или зеркального сервера)")
+    parser.add_argument("--metrics-port", type=int, default=0,
+                        help="порт HTTP с метриками /metrics и /metrics.json (0 - выключено)")
+    parser.add_argument("--duration", type=float, default=0,
+                        help="остановиться через N секунд (0 - работать до сигнала)")
+    parser.add_argument("--stats-interval", type=float, default=10,
+                        help="период вывода статистики в stderr, сек")
+    parser.add_argument("--log-level", choices=["DEBUG", "INFO", "WARNING", "ERROR"], default="INFO",
+                        help="уровень журнала в stderr (DEBUG - каждая проверка)")
+    parser.add_argument("--quiet", action="store_true",
+                        help="не писать журнал совсем")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    from logs import setup_logging
+    setup_logging(args.log_level, silent=args.quiet)
+
+    # Тяжелые модули грузим только после разбора аргументов
+    from generator import UsernameGenerator
+    from parser import FragmentParser
+    from pipeline import CheckPipeline
+    from ratelimit import AdaptiveLimiter
+
+    generator = UsernameGenerator()
+    if args.wordlist:
+        from wordindex import open_wordlist
+        index = open_wordlist(args.wordlist)
+        generator.set_word_index(index, prefix=args.word_prefix)
+        logger.info("📚 Словарь: %d слов (%s)", len(index), index.path)
+    # В состоянии хранится и курсор слов, поэтому оно нужно и без --sweep
+    if args.sweep_state and os.path.exists(args.sweep_state):
+        generator.load_sweep_state(args.sweep_state)
+    if args.sweep:
+        generator.set_sweep_mode(True)
+
+    limiter = AdaptiveLimiter(initial=min(15, args.workers), max_limit=args.workers) if args.adaptive else None
+    proxies = None
+    if args.proxies:
+        from proxies import ProxyPool
+        proxies = ProxyPool.from_file(args.proxies, rate=args.proxy_rate)
+        logger.info("🌐 Прокси: %d", len(proxies))
+
+    fragment = FragmentParser(limiter=limiter, base_url=args.base_url,
+                              pool_size=args.workers, sessions=args.sessions, proxies=proxies)
+    store = None
+    if args.db:
+        from storage import ResultStore
+        store = ResultStore(args.db, ttl=args.ttl)
+
+    output = None
+    if args.output:
+        from sink import ResultSink
+        output = ResultSink(args.output, only_available=not args.all_results,
+                            max_bytes=int(args.output_max_mb * 1024 * 1024))
+
+    def on_result(result):
+        if output:
+            output.write(result)
+
+    def on_transition(username, previous, available, result):
+        # В режиме наблюдения в файл пишутся только смены статуса
+        if output:
+            output.write(dict(result.to_dict(), previous='Available' if previous else 'Taken'))
+
+    metrics_server = None
+    if args.metrics_port:
+        from metrics import MetricsServer
+        metrics_server = MetricsServer(args.metrics_port).start()
+
+    scorer = None
+    if args.prioritize:
+        from scoring import ValueScorer
+        words = list(generator.popular_words)
+        if args.dictionary:
+            with open(args.dictionary, "r", encoding="utf-8") as f:
+                words.extend(line.strip() for line in f if line.strip())
+        scorer = ValueScorer(dictionary=words)
+
+    watchlist = None
+    if args.watch:
+        from watchlist import Watchlist, WatchMonitor
+        watchlist = Watchlist(default_interval=args.watch_interval)
+        watch_state = args.watch + ".state"
+        if os.path.exists(watch_state):
+            watchlist.load(watch_state)
+        watchlist.load(args.watch)
+        if output:
+            output.only_available = False
+        rate = args.rate or 1.0
+        pipeline = WatchMonitor(fragment, watchlist, rate=rate, workers=args.workers,
+                                on_transition=on_transition, on_result=store.record if store else None)
+        logger.info("👁️ Наблюдение: %d имен, %.1f проверок/сек", len(watchlist), rate)
+    else:
+        pipeline = CheckPipeline(generator, fragment, category=args.category, workers=args.workers,
+                                 rate=args.rate, store=store, scorer=scorer,
+                                 queue_size=args.lookahead if scorer else 200, on_result=on_result)
+
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    start_time = time.time()
+    watch_saved = start_time
+    deadline = start_time + args.duration if args.duration else None
+    pipeline.start()
+    # Прогрев и keepalive расходуют тот же темп, что и проверки; прогрев идет
+    # в фоне и останавливается вместе с конвейером
+    budget = pipeline.bucket if watchlist is not None else pipeline.rate_limiter
+    fragment.start_warm_up(budget=budget, stop_event=pipeline.stop_event)
+    fragment.start_keepalive(budget=budget)
+
+    try:
+        while not stop_event.is_set() and not pipeline.finished:
+            # Не пересыпаем срок --duration
+            wait = args.stats_interval
+            if deadline:
+                wait = min(wait, max(0.0, deadline - time.time()))
+            stop_event.wait(wait)
+            elapsed = time.time() - start_time
+            speed = pipeline.total_checked / elapsed if elapsed > 0 else 0
+            if watchlist is not None:
+                logger.info("👁️ Проверено: %d | 🔔 Смен статуса: %d | ❌ Ошибок: %d | ⏳ Ждут: %d | 🚀 %.1f/сек",
+                            pipeline.total_checked, pipeline.total_transitions, pipeline.total_errors,
+                            watchlist.backlog(), speed)
+                # Весь список переписывается целиком, поэтому реже, чем статистика
+                if time.time() - watch_saved >= args.watch_save_interval:
+                    watchlist.save(watch_state)
+                    watch_saved = time.time()
+            else:
+                logger.info("📊 Проверено: %d | 🎯 Найдено: %d | ❌ Ошибок: %d | 🔁 Повторов: %d | 🚀 %.1f/сек",
+                            pipeline.total_checked, pipeline.total_found, pipeline.total_errors,
+                            pipeline.total_retries, speed)
+            if output:
+                output.flush()
+            if args.sweep_state:
+                generator.save_sweep_state(args.sweep_state)
+            if deadline and time.time() >= deadline:
+                break
+    finally:
+        pipeline.stop()
+        pipeline.join(5)
+        if watchlist is not None:
+            watchlist.save(watch_state)
+        if args.sweep_state:
+            generator.save_sweep_state(args.sweep_state)
+        if store:
+            store.close()
+        if metrics_server:
+            metrics_server.stop()
+        if output:
+            output.close()
+        pool = fragment.pool_stats()
+        fragment.close()
+
+    if watchlist is not None:
+        logger.info("🎯 Итого: %d проверено, %d смен статуса", pipeline.total_checked, pipeline.total_transitions)
+    else:
+        logger.info("🎯 Итого: %d проверено, %d найдено", pipeline.total_checked, pipeline.total_found)
+    logger.info("🔌 Соединений открыто: %d на %d запросов (переиспользование %.0f%%)",
+                pool['connections'], pool['requests'], pool['reuse_ratio'] * 100)
+    if proxies:
+        for item in proxies.stats():
+            logger.info("🌐 %s: %d запросов, 429: %d, ошибок: %d, здоровье %.2f",
+                        item['proxy'], item['requests'], item['throttled'], item['errors'], item['health'])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
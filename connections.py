@@ -0,0 +1,67 @@
+"""Подсчет реально открытых сокетов в пулах urllib3.
+
+pool.num_connections растет только при создании нового объекта соединения и
+не видит переподключений: когда сервер закрыл простаивающее соединение,
+urllib3 пишет "Resetting dropped connection" и открывает сокет заново в том
+же объекте. CountingAdapter подменяет классы пулов своих менеджеров (прямого
+и прокси) так, что каждый вызов _new_conn соединения попадает в счетчик.
+"""
+import threading
+from typing import Dict
+
+from requests.adapters import HTTPAdapter
+
+
+class ConnectionCounter:
+    """Потокобезопасный счетчик открытых сокетов, общий для нескольких адаптеров"""
+
+    def __init__(self):
+        self.value = 0
+        self.lock = threading.Lock()
+        self._pool_classes: Dict[type, type] = {}
+
+    def increment(self):
+        with self.lock:
+            self.value += 1
+
+    def pool_class(self, base: type) -> type:
+        """Подкласс пула base, чьи соединения отмечают каждое открытие сокета"""
+        with self.lock:
+            cls = self._pool_classes.get(base)
+            if cls is None:
+                counter = self
+
+                class Connection(base.ConnectionCls):
+                    def _new_conn(self):
+                        sock = super()._new_conn()
+                        counter.increment()
+                        return sock
+
+                Connection.__name__ = 'Counting' + base.ConnectionCls.__name__
+                cls = self._pool_classes[base] = type('Counting' + base.__name__, (base,),
+                                                      {'ConnectionCls': Connection})
+            return cls
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter, сообщающий счетчику о каждом открытом сокете"""
+
+    def __init__(self, counter: ConnectionCounter, *args, **kwargs):
+        # HTTPAdapter.__init__ сам вызывает init_poolmanager
+        self.counter = counter
+        super().__init__(*args, **kwargs)
+
+    def _count(self, manager):
+        manager.pool_classes_by_scheme = {scheme: self.counter.pool_class(cls)
+                                          for scheme, cls in manager.pool_classes_by_scheme.items()}
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self._count(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        fresh = proxy not in self.proxy_manager
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if fresh:
+            self._count(manager)
+        return manager
@@ -1,10 +1,35 @@
+import json
+import logging
+import os
 import random
 import string
-from typing import List, Set
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from keyspace import KeyspaceEnumerator, UsernameSet
+from metrics import METRICS
+from wordindex import WordCursor, WordIndex
+
+logger = logging.getLogger(__name__)
 
 class UsernameGenerator:
     def __init__(self):
-        self.used_usernames: Set[str] = set()
+        # История на всю сессию: 4/5-буквенные имена хранятся битами
+        self.used_usernames = UsernameSet()
+        
+        # Режим полного перебора: длина -> перечислитель пространства
+        self.sweep_mode = False
+        self.sweeps: Dict[int, KeyspaceEnumerator] = {}
+        
+        # Внешний словарь для категории english (None - только popular_words)
+        self.words: Optional[WordCursor] = None
+        
+        # Выданные, но еще не проверенные имена перебора: имя -> (курсор, позиция).
+        # В состояние пишется не позиция генератора, а самая ранняя непроверенная,
+        # поэтому имена из очередей и повторов не теряются при перезапуске.
+        # Потребитель отмечает проверенные через mark_checked
+        self.outstanding: Dict[str, Tuple[str, object]] = {}
+        self.progress_lock = threading.Lock()
         
         # Популярные английские слова
         self.popular_words = [
@@ -21,8 +46,98 @@ class UsernameGenerator:
         self.prefixes = ['super', 'mega', 'ultra', 'hyper', 'neo', 'pro', 'alpha', 'omega']
         self.suffixes = ['tech', 'net', 'hub', 'lab', 'zone', 'world', 'space', 'time']
 
+    def set_sweep_mode(self, enabled: bool):
+        """Включает полный перебор 4/5-символьных имен без повторов"""
+        self.sweep_mode = enabled
+
+    def get_sweep(self, length: int) -> KeyspaceEnumerator:
+        """Перечислитель для длины length (создается при первом обращении)"""
+        if length not in self.sweeps:
+            self.sweeps[length] = KeyspaceEnumerator(length)
+        return self.sweeps[length]
+
+    def set_word_index(self, index: WordIndex, lengths: Iterable[int] = range(4, 9), prefix: str = ''):
+        """Слова для категории english берутся из индекса по порядку, без повторов"""
+        self.words = WordCursor(index, lengths, prefix)
+
+    def sweep_finished(self, category: str) -> bool:
+        """Пройдено ли все пространство категории в режиме перебора"""
+        if category == "english":
+            return self.words is not None and self.words.exhausted
+        lengths = {"4char": 4, "5char": 5}
+        if not self.sweep_mode or category not in lengths:
+            return False
+        return self.get_sweep(lengths[category]).exhausted
+
+    def mark_checked(self, usernames: Iterable[str]):
+        """Отмечает имена перебора проверенными окончательно"""
+        with self.progress_lock:
+            for username in usernames:
+                self.outstanding.pop(username, None)
+
+    def _issue(self, key: str, usernames: List[str], positions: Iterable):
+        for username, position in zip(usernames, positions):
+            self.outstanding[username] = (key, position)
+
+    def save_sweep_state(self, filename: str):
+        """Сохраняет курсоры перебора в JSON - по самой ранней непроверенной позиции"""
+        with self.progress_lock:
+            low: Dict[str, object] = {}
+            for key, position in self.outstanding.values():
+                if key not in low or position < low[key]:
+                    low[key] = position
+            state = {}
+            for length, sweep in self.sweeps.items():
+                state[str(length)] = sweep.state()
+                if str(length) in low:
+                    state[str(length)]['cursor'] = low[str(length)]
+            if self.words is not None:
+                state['english'] = self.words.state()
+                if 'english' in low:
+                    state['english']['length_pos'], state['english']['position'] = low['english']
+        tmp_path = filename + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, filename)
+
+    def load_sweep_state(self, filename: str):
+        """Восстанавливает курсоры перебора из JSON.
+
+        Позиция слов восстанавливается, только если совпадают индекс, префикс
+        и длины текущего курсора; иначе курсор остается новым.
+        """
+        with open(filename, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        words = state.pop('english', None)
+        with self.progress_lock:
+            self.outstanding.clear()
+        self.sweeps = {int(length): KeyspaceEnumerator.from_state(s) for length, s in state.items()}
+        if words is None:
+            return
+        if self.words is None:
+            self.words = WordCursor.from_state(words)
+            return
+        current = self.words.state()
+        same = (os.path.abspath(current['index']) == os.path.abspath(words['index'])
+                and current['prefix'] == words['prefix'] and current['lengths'] == words['lengths'])
+        if same:
+            self.words = WordCursor.from_state(words, self.words.index)
+        else:
+            # Словарь или фильтры сменились: позиция старого обхода к новому не относится
+            logger.warning("⚠️ Позиция слов в %s сохранена для %s (префикс '%s'), начинаем %s заново",
+                           filename, words['index'], words['prefix'], current['index'])
+
     def generate_4char_usernames(self, count: int) -> List[str]:
         """Генерация 4-символьных юзернеймов"""
+        if self.sweep_mode:
+            sweep = self.get_sweep(4)
+            with self.progress_lock:
+                start = sweep.cursor
+                usernames = sweep.next_batch(count)
+                self._issue('4', usernames, range(start, sweep.cursor))
+            METRICS.inc('generator_attempts_total', len(usernames), labels={'category': '4char'})
+            return usernames
+        
         usernames = []
         attempts = 0
         
@@ -44,10 +159,20 @@ class UsernameGenerator:
             
             attempts += 1
         
+        METRICS.inc('generator_attempts_total', attempts, labels={'category': '4char'})
         return usernames
 
     def generate_5char_usernames(self, count: int) -> List[str]:
         """Генерация 5-символьных юзернеймов"""
+        if self.sweep_mode:
+            sweep = self.get_sweep(5)
+            with self.progress_lock:
+                start = sweep.cursor
+                usernames = sweep.next_batch(count)
+                self._issue('5', usernames, range(start, sweep.cursor))
+            METRICS.inc('generator_attempts_total', len(usernames), labels={'category': '5char'})
+            return usernames
+        
         usernames = []
         attempts = 0
         
@@ -76,23 +201,29 @@ class UsernameGenerator:
             
             attempts += 1
         
+        METRICS.inc('generator_attempts_total', attempts, labels={'category': '5char'})
         return usernames
 
     def generate_english_words(self, count: int) -> List[str]:
         """Генерация английских слов"""
-        usernames = []
-        attempts = 0
+        if self.words is not None:
+            # Индекс уже без повторов, история не нужна
+            positions: List[Tuple[int, int]] = []
+            with self.progress_lock:
+                usernames = self.words.next_batch(count, positions)
+                self._issue('english', usernames, positions)
+            METRICS.inc('generator_attempts_total', len(usernames), labels={'category': 'english'})
+            return usernames
         
-        while len(usernames) < count and attempts < 1000:
-            # Берем популярные слова разной длины
-            word = random.choice(self.popular_words)
-            
-            if word not in self.used_usernames and 4 <= len(word) <= 8:
-                self.used_usernames.add(word)
-                usernames.append(word)
-            
-            attempts += 1
+        # Выбираем из еще не выданных слов, а не угадываем случайно:
+        # когда список исчерпан, сразу возвращаем пустой батч
+        candidates = [word for word in self.popular_words
+                      if 4 <= len(word) <= 8 and word not in self.used_usernames]
+        usernames = random.sample(candidates, min(count, len(candidates)))
+        for word in usernames:
+            self.used_usernames.add(word)
         
+        METRICS.inc('generator_attempts_total', len(usernames), labels={'category': 'english'})
         return usernames
 
     def generate_batch(self, count: int, category: str = "4char") -> List[str]:
@@ -106,13 +237,14 @@ class UsernameGenerator:
         else:
             usernames = self.generate_4char_usernames(count)
         
-        print(f"🎲 Сгенерировано {len(usernames)} юзернеймов (категория: {category})")
+        METRICS.inc('generator_candidates_total', len(usernames), labels={'category': category})
+        logger.debug("🎲 Сгенерировано %d юзернеймов (категория: %s)", len(usernames), category)
         if usernames:
-            print(f"📋 Примеры: {', '.join(usernames[:3])}...")
+            logger.debug("📋 Примеры: %s...", ', '.join(usernames[:3]))
         
         return usernames
 
     def clear_used_usernames(self):
         """Очистка истории использованных юзернеймов"""
         self.used_usernames.clear()
-        print("🧹 История юзернеймов очищена")
\ No newline at end of file
+        logger.info("🧹 История юзернеймов очищена")
\ No newline at end of file
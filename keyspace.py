@@ -0,0 +1,176 @@
+import random
+import string
+from typing import Dict, Iterable, List, Optional, Set
+
+ALPHABET = string.ascii_lowercase
+
+
+def index_to_name(index: int, length: int, alphabet: str = ALPHABET) -> str:
+    """Переводит индекс в юзернейм фиксированной длины (система счисления по алфавиту)"""
+    base = len(alphabet)
+    chars = []
+    for _ in range(length):
+        index, digit = divmod(index, base)
+        chars.append(alphabet[digit])
+    return ''.join(reversed(chars))
+
+
+def name_to_index(name: str, alphabet: str = ALPHABET) -> Optional[int]:
+    """Обратное преобразование. None если в имени есть символы вне алфавита"""
+    base = len(alphabet)
+    index = 0
+    for char in name:
+        digit = alphabet.find(char)
+        if digit < 0:
+            return None
+        index = index * base + digit
+    return index
+
+
+class KeyspaceEnumerator:
+    """Полный перебор пространства юзернеймов длины length без повторов.
+
+    Позиция курсора переводится в индекс биекцией (аффинное преобразование +
+    несколько раундов перемешивания цифр), поэтому порядок выглядит случайным,
+    а каждое имя выдается ровно один раз без хранения множества проверенных.
+    Состояние (length, seed, cursor) можно сохранить и продолжить позже.
+    """
+
+    ROUNDS = 3
+
+    def __init__(self, length: int, seed: Optional[int] = None, cursor: int = 0,
+                 alphabet: str = ALPHABET):
+        self.length = length
+        self.alphabet = alphabet
+        self.base = len(alphabet)
+        self.size = self.base ** length
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.cursor = cursor
+
+        rng = random.Random(self.seed)
+        # Множитель должен быть взаимно прост с размером пространства
+        self.multiplier = rng.randrange(1, self.size)
+        while self._gcd(self.multiplier, self.size) != 1:
+            self.multiplier = rng.randrange(1, self.size)
+        self.offset = rng.randrange(self.size)
+        self.round_keys = [
+            [[rng.randrange(1, self.base) for _ in range(length)] for _ in range(length)]
+            for _ in range(self.ROUNDS)
+        ]
+        # Нелинейные подстановки, чтобы порядок не был арифметической прогрессией
+        self.sboxes = [rng.sample(range(self.base), self.base) for _ in range(self.ROUNDS)]
+
+    @staticmethod
+    def _gcd(a: int, b: int) -> int:
+        while b:
+            a, b = b, a % b
+        return a
+
+    def permute(self, position: int) -> int:
+        """Биекция [0, size) -> [0, size)"""
+        value = (position * self.multiplier + self.offset) % self.size
+
+        digits = []
+        for _ in range(self.length):
+            value, digit = divmod(value, self.base)
+            digits.append(digit)
+
+        # Каждая цифра сдвигается на функцию от остальных цифр - шаг обратим
+        for keys, sbox in zip(self.round_keys, self.sboxes):
+            for j in range(self.length):
+                row = keys[j]
+                shift = row[j]
+                for k in range(self.length):
+                    if k != j:
+                        shift += sbox[digits[k]] * row[k]
+                digits[j] = sbox[(digits[j] + shift) % self.base]
+
+        value = 0
+        for digit in reversed(digits):
+            value = value * self.base + digit
+        return value
+
+    def name_at(self, position: int) -> str:
+        return index_to_name(self.permute(position), self.length, self.alphabet)
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.size - self.cursor)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.cursor >= self.size
+
+    def next_batch(self, count: int) -> List[str]:
+        """Следующие count имен по курсору"""
+        stop = min(self.size, self.cursor + count)
+        names = [self.name_at(position) for position in range(self.cursor, stop)]
+        self.cursor = stop
+        return names
+
+    def state(self) -> Dict:
+        return {'length': self.length, 'seed': self.seed, 'cursor': self.cursor}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'KeyspaceEnumerator':
+        return cls(state['length'], seed=state['seed'], cursor=state['cursor'])
+
+
+class UsernameSet:
+    """Компактное множество юзернеймов для дедупликации.
+
+    Имена длины из lengths, состоящие из символов alphabet, хранятся битом
+    в битовой карте по своему индексу (26^4 бит ~ 57 КБ, 26^5 бит ~ 1.4 МБ).
+    Остальные имена (слова другой длины, цифры) - в обычном множестве.
+    """
+
+    def __init__(self, lengths: Iterable[int] = (4, 5), alphabet: str = ALPHABET):
+        self.lengths = set(lengths)
+        self.alphabet = alphabet
+        self.bitmaps: Dict[int, bytearray] = {}
+        self.fallback: Set[str] = set()
+        self.count = 0
+
+    def _locate(self, name: str):
+        """(битовая карта, байт, маска) или None, если имя хранится в fallback"""
+        length = len(name)
+        if length not in self.lengths:
+            return None
+        index = name_to_index(name, self.alphabet)
+        if index is None:
+            return None
+        bitmap = self.bitmaps.get(length)
+        if bitmap is None:
+            # Карта выделяется при первом имени этой длины
+            bitmap = self.bitmaps[length] = bytearray((len(self.alphabet) ** length + 7) // 8)
+        return bitmap, index >> 3, 1 << (index & 7)
+
+    def add(self, name: str) -> bool:
+        """Добавляет имя. True если его еще не было"""
+        location = self._locate(name)
+        if location is None:
+            if name in self.fallback:
+                return False
+            self.fallback.add(name)
+        else:
+            bitmap, byte, mask = location
+            if bitmap[byte] & mask:
+                return False
+            bitmap[byte] |= mask
+        self.count += 1
+        return True
+
+    def __contains__(self, name: str) -> bool:
+        location = self._locate(name)
+        if location is None:
+            return name in self.fallback
+        bitmap, byte, mask = location
+        return bool(bitmap[byte] & mask)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def clear(self):
+        self.bitmaps.clear()
+        self.fallback.clear()
+        self.count = 0
@@ -0,0 +1,64 @@
+"""Настройка логирования: записи уходят в очередь, а пишет их фоновый поток.
+
+Рабочие потоки только кладут запись в очередь (форматирование строки
+откладывается до вывода), поэтому вывод в терминал не тормозит запросы.
+Построчные результаты проверок пишутся на уровне DEBUG.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional, TextIO, Union
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler без подготовки записи в вызывающем потоке.
+
+    Стандартный prepare() форматирует сообщение и копирует запись, чтобы ее
+    можно было передать в другой процесс. Очередь здесь внутри процесса,
+    поэтому запись уходит как есть, а форматирует ее поток QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: Union[int, str] = logging.INFO, silent: bool = False,
+                  stream: TextIO = sys.stderr) -> None:
+    """Подключает очередь и фоновый вывод к корневому логгеру"""
+    global _listener
+
+    root = logging.getLogger()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if silent:
+        # Полная тишина: записи отбрасываются до создания LogRecord
+        root.addHandler(logging.NullHandler())
+        root.setLevel(logging.CRITICAL + 1)
+        return
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter("%(message)s"))
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(_DeferredQueueHandler(records))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Дописывает очередь и останавливает фоновый поток"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
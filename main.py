@@ -1,11 +1,30 @@
+import os
 import time
 import threading
-import json
+from collections import deque
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, scrolledtext
 from generator import UsernameGenerator
 from parser import FragmentParser
+from pipeline import CheckPipeline
+from storage import ResultStore
+from ratelimit import AdaptiveLimiter
+from results_view import ResultsTable
+from scoring import ValueScorer
+from sink import ResultSink
+from wordindex import WordIndex
+from metrics import METRICS
+from logs import setup_logging
+
+SWEEP_STATE_FILE = "sweep_state.json"
+RESULTS_DB_FILE = "results.db"
+WORD_INDEX_FILE = "words.idx"  # Словарь для английских слов (python -m wordindex words.txt words.idx)
+RECHECK_TTL = 24 * 3600  # Не перепроверять имена, проверенные за последние сутки
+UI_FLUSH_INTERVAL_MS = 100  # Как часто поток Tk забирает накопленные логи
+MAX_LOG_LINES = 2000  # Сколько последних строк лога держит окно
+PRIORITY_LOOKAHEAD = 5000  # Из скольких ожидающих кандидатов выбирается самый ценный
+MAX_TABLE_ROWS = 10000  # Сколько последних найденных имен держит таблица (все - в файле)
 
 class UsernameCheckerApp:
     def __init__(self, root):
@@ -14,15 +33,29 @@ class UsernameCheckerApp:
         self.root.geometry("900x700")
         
         self.generator = UsernameGenerator()
-        self.parser = FragmentParser()
+        if os.path.exists(WORD_INDEX_FILE):
+            self.generator.set_word_index(WordIndex(WORD_INDEX_FILE))
+        self.parser = FragmentParser(limiter=AdaptiveLimiter())
+        self.store = ResultStore(RESULTS_DB_FILE, ttl=RECHECK_TTL)
         self.running = False
-        self.available_usernames = []
+        # Найденные имена пишутся в файл сразу; в памяти - только еще не показанные в таблице
+        self.new_results = deque(maxlen=MAX_TABLE_ROWS)
+        self.sink = None
+        self.results_file = None
         self.total_checked = 0
         self.total_found = 0
         self.start_time = None
         self.current_category = "4char"  # Категория по умолчанию
+        self.pipeline = None
+        
+        # Логи из рабочих потоков копятся здесь и выводятся потоком Tk пачками.
+        # append/popleft у deque потокобезопасны, блокировка не нужна
+        self.log_queue = deque(maxlen=MAX_LOG_LINES)
+        self.results_dirty = False
+        self.last_stats_update = 0.0
         
         self.setup_ui()
+        self.root.after(UI_FLUSH_INTERVAL_MS, self.flush_ui)
         
     def setup_ui(self):
         # Создаем вкладки
@@ -58,6 +91,21 @@ class UsernameCheckerApp:
         ttk.Radiobutton(category_frame, text="Английские слова", variable=self.category_var, 
                        value="english", command=self.update_category).pack(anchor='w')
         
+        self.sweep_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(category_frame, text="Полный перебор (без повторов)", variable=self.sweep_var,
+                        command=self.update_sweep_mode).pack(anchor='w')
+        
+        self.prioritize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(category_frame, text="Сначала ценные имена", variable=self.prioritize_var).pack(anchor='w')
+        
+        # Целевой темп проверок
+        rate_frame = ttk.LabelFrame(control_frame, text="Лимит, проверок/сек (0 - без лимита)")
+        rate_frame.pack(side='left', fill='y', padx=5)
+        
+        self.rate_var = tk.StringVar(value="0")
+        ttk.Spinbox(rate_frame, from_=0, to=1000, increment=1, width=8,
+                    textvariable=self.rate_var, command=self.update_rate).pack(padx=5, pady=5)
+        
         # Кнопки управления
         button_frame = ttk.Frame(control_frame)
         button_frame.pack(side='right', fill='y', padx=5)
@@ -98,32 +146,48 @@ class UsernameCheckerApp:
         self.results_label = ttk.Label(results_frame, text="Доступные юзернеймы не найдены")
         self.results_label.pack(pady=5)
         
-        # Таблица
-        columns = ('username', 'status', 'response_time', 'url')
-        self.results_tree = ttk.Treeview(results_frame, columns=columns, show='headings', height=15)
-        
-        self.results_tree.heading('username', text='Юзернейм')
-        self.results_tree.heading('status', text='Статус')
-        self.results_tree.heading('response_time', text='Время ответа')
-        self.results_tree.heading('url', text='Ссылка')
-        
-        self.results_tree.column('username', width=120)
-        self.results_tree.column('status', width=100)
-        self.results_tree.column('response_time', width=80)
-        self.results_tree.column('url', width=200)
-        
-        # Скроллбар для таблицы
-        scrollbar = ttk.Scrollbar(results_frame, orient='vertical', command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.results_tree.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        # Таблица: постраничная, с сортировкой по клику на заголовок и фильтрами
+        self.results_table = ResultsTable(results_frame, max_rows=MAX_TABLE_ROWS)
         
     def update_category(self):
         """Обновляет выбранную категорию"""
         self.current_category = self.category_var.get()
+        if self.pipeline:
+            self.pipeline.category = self.current_category
         self.log_message(f"📁 Выбрана категория: {self.get_category_name()}")
         
+    def update_sweep_mode(self):
+        """Включает/выключает полный перебор пространства 4/5-символьных имен"""
+        enabled = self.sweep_var.get()
+        if enabled and not self.generator.sweeps and os.path.exists(SWEEP_STATE_FILE):
+            try:
+                self.generator.load_sweep_state(SWEEP_STATE_FILE)
+                self.log_message(f"📂 Продолжаем перебор с сохраненной позиции ({SWEEP_STATE_FILE})")
+            except (OSError, ValueError, KeyError) as e:
+                self.log_message(f"❌ Не удалось загрузить состояние перебора: {e}")
+        self.generator.set_sweep_mode(enabled)
+        self.log_message(f"🔁 Полный перебор: {'включен' if enabled else 'выключен'}")
+        
+    def save_sweep_state(self):
+        """Сохраняет позицию перебора, чтобы продолжить после перезапуска"""
+        if self.generator.sweeps:
+            try:
+                self.generator.save_sweep_state(SWEEP_STATE_FILE)
+            except OSError as e:
+                self.log_message(f"❌ Не удалось сохранить состояние перебора: {e}")
+        
+    def get_rate(self):
+        """Возвращает целевой темп из поля ввода"""
+        try:
+            return max(0.0, float(self.rate_var.get()))
+        except ValueError:
+            return 0.0
+            
+    def update_rate(self):
+        """Применяет новый темп к работающему конвейеру"""
+        if self.pipeline:
+            self.pipeline.set_rate(self.get_rate())
+        
     def get_category_name(self):
         """Возвращает название категории"""
         categories = {
@@ -134,11 +198,40 @@ class UsernameCheckerApp:
         return categories.get(self.current_category, "4-символьные")
         
     def log_message(self, message):
-        """Добавляет сообщение в лог"""
-        self.log_text.config(state='normal')
-        self.log_text.insert('end', message + '\n')
-        self.log_text.see('end')
-        self.log_text.config(state='disabled')
+        """Добавляет сообщение в лог (можно вызывать из любого потока)"""
+        self.log_queue.append(message)
+        
+    def flush_ui(self):
+        """Периодически выводит накопленные логи, статистику и результаты (поток Tk)"""
+        lines = []
+        while True:
+            try:
+                lines.append(self.log_queue.popleft())
+            except IndexError:
+                break
+        
+        if lines:
+            self.log_text.config(state='normal')
+            self.log_text.insert('end', '\n'.join(lines) + '\n')
+            
+            # Держим в окне только последние MAX_LOG_LINES строк
+            line_count = int(self.log_text.index('end-1c').split('.')[0]) - 1
+            if line_count > MAX_LOG_LINES:
+                self.log_text.delete('1.0', f'{line_count - MAX_LOG_LINES + 1}.0')
+            
+            self.log_text.see('end')
+            self.log_text.config(state='disabled')
+        
+        if self.results_dirty:
+            self.results_dirty = False
+            self.update_results_tab()
+        
+        now = time.monotonic()
+        if self.running and now - self.last_stats_update >= 1:
+            self.last_stats_update = now
+            self.update_stats()
+        
+        self.root.after(UI_FLUSH_INTERVAL_MS, self.flush_ui)
         
     def update_stats(self):
         """Обновляет статистику"""
@@ -152,55 +245,50 @@ class UsernameCheckerApp:
                          f"⏱️ Время: {elapsed:.0f} сек | "
                          f"📁 Категория: {self.get_category_name()} | "
                          f"🎲 Уникальных: {len(self.generator.used_usernames)}")
+            outcomes = METRICS.counters_by_label('fragment_checks_total', 'outcome')
+            throttled = outcomes.get('HTTP 429', 0)
+            timeouts = outcomes.get('Timeout', 0) + outcomes.get('ConnectionError', 0)
+            stats_text += (f" | ⏱️ p95: {METRICS.quantile('fragment_check_latency_seconds', 0.95):.2f}с"
+                           f" | 🚧 429: {throttled:.0f} | ⌛ Таймауты: {timeouts:.0f}")
+            limiter = self.parser.limiter
+            if limiter:
+                stats_text += (f" | ⚙️ Параллельно: {limiter.in_flight}/{limiter.current_limit}"
+                               f" | 📈 {limiter.observed_rate():.1f}/сек")
+            if self.generator.sweep_mode:
+                lengths = {"4char": 4, "5char": 5}
+                if self.current_category in lengths:
+                    sweep = self.generator.get_sweep(lengths[self.current_category])
+                    stats_text += f" | 🔁 Перебор: {sweep.cursor}/{sweep.size}"
             self.stats_label.config(text=stats_text)
         
     def update_results_tab(self):
-        """Обновляет вкладку с результатами"""
-        # Очищаем таблицу
-        for item in self.results_tree.get_children():
-            self.results_tree.delete(item)
+        """Добавляет в таблицу только новые результаты"""
+        new_results = []
+        while True:
+            try:
+                new_results.append(self.new_results.popleft())
+            except IndexError:
+                break
+        if new_results:
+            self.results_table.append(new_results)
             
-        if self.available_usernames:
-            self.results_label.config(text=f"Найдено {len(self.available_usernames)} доступных юзернеймов")
-            
-            for user in self.available_usernames:
-                self.results_tree.insert('', 'end', values=(
-                    user['username'],
-                    user['status'],
-                    f"{user['response_time']}с",
-                    user['url']
-                ))
+        if self.total_found:
+            self.results_label.config(text=f"Найдено {self.total_found} доступных юзернеймов")
         else:
             self.results_label.config(text="Доступные юзернеймы не найдены")
             
     def save_results(self):
-        """Сохраняет результаты в файл"""
-        if not self.available_usernames:
+        """Досбрасывает на диск файл, в который результаты пишутся по мере нахождения"""
+        if not self.results_file:
             self.log_message("❌ Нет доступных юзернеймов для сохранения")
             return
             
-        filename = f"available_usernames_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("🎯 ДОСТУПНЫЕ ЮЗЕРНЕЙМЫ НА FRAGMENT.COM\n")
-                f.write("=" * 60 + "\n\n")
-                f.write(f"Категория: {self.get_category_name()}\n")
-                f.write(f"Всего проверено: {self.total_checked} юзернеймов\n")
-                f.write(f"Найдено доступных: {len(self.available_usernames)}\n")
-                f.write(f"Время начала: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Время сохранения: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                
-                for user in self.available_usernames:
-                    f.write(f"🔹 Юзернейм: {user['username']}\n")
-                    f.write(f"🔗 Ссылка:   {user['url']}\n")
-                    f.write(f"📊 Статус:   {user['status']}\n")
-                    f.write(f"⏱️  Время ответа: {user.get('response_time', 0)}с\n")
-                    f.write("-" * 40 + "\n")
-            
-            self.log_message(f"💾 Сохранено в {filename}")
+            if self.sink:
+                self.sink.flush()
+            self.log_message(f"💾 Сохранено в {self.results_file} ({self.total_found} шт.)")
             
-        except Exception as e:
+        except OSError as e:
             self.log_message(f"❌ Ошибка при сохранении: {e}")
             
     def start_checking(self):
@@ -208,7 +296,8 @@ class UsernameCheckerApp:
         if not self.running:
             self.running = True
             self.start_time = datetime.now()
-            self.available_usernames = []
+            self.new_results.clear()
+            self.results_table.clear()
             self.total_checked = 0
             self.total_found = 0
             
@@ -234,74 +323,74 @@ class UsernameCheckerApp:
             self.log_message("🛑 Проверка остановлена")
             self.log_message(f"🎯 Итого: {self.total_checked} проверено, {self.total_found} найдено")
             
-            # Обновляем таблицу результатов после остановки
+            # Обновляем таблицу результатов и статистику после остановки
             self.update_results_tab()
+            self.update_stats()
             
-    def check_batch(self):
-        """Проверка одного батча юзернеймов"""
-        usernames = self.generator.generate_batch(40, self.current_category)
-        self.log_message(f"🎲 Сгенерировано: {len(usernames)} юзернеймов")
-        if usernames:
-            self.log_message(f"📋 Примеры: {', '.join(usernames[:3])}...")
-        
-        results = self.parser.check_usernames_batch(usernames)
-        
-        # Обновляем статистику
-        self.total_checked += len(usernames)
-        
-        # Анализируем результаты
-        successful = sum(1 for r in results if r['success'])
-        available = [r for r in results if r['available']]
-        errors = len(results) - successful
-        
-        # Логируем результаты батча
-        self.log_message(f"📊 Результаты батча:")
-        self.log_message(f"   ✅ Успешных: {successful}/{len(usernames)}")
-        self.log_message(f"   ❌ Ошибок: {errors}")
-        self.log_message(f"   🎯 Доступных: {len(available)}")
-        
-        if available:
-            self.available_usernames.extend(available)
-            self.total_found += len(available)
-            self.log_message(f"   🎉 НАЙДЕНО ДОСТУПНЫХ:")
-            for user in available:
-                self.log_message(f"      🔹 {user['username']} - {user['status']} ({user['response_time']}s)")
+    def handle_result(self, result):
+        """Обработка одного результата (вызывается стадией вывода конвейера)"""
+        self.total_checked += 1
+        
+        if result['available']:
+            self.sink.write(result)
+            self.new_results.append(result)
+            self.total_found += 1
+            self.log_message(f"   🎉 НАЙДЕН: {result['username']} - {result['status']} ({result['response_time']}s)")
             
-            # Обновляем таблицу результатов
-            self.update_results_tab()
-        
-        return len(available)
+            # Таблица обновится при следующем проходе flush_ui
+            self.results_dirty = True
+        
+        # Периодическая сводка
+        if self.total_checked % 100 == 0:
+            self.log_message(f"📊 Проверено: {self.total_checked} | "
+                             f"🎯 Доступных: {self.total_found} | "
+                             f"❌ Ошибок: {self.pipeline.total_errors} | "
+                             f"🔁 Повторов: {self.pipeline.total_retries} | "
+                             f"⏭️ Пропущено (уже проверены): {self.pipeline.total_skipped}")
     
     def run_continuous(self):
-        """Бесконечный цикл проверки (запускается в потоке)"""
-        batch_count = 0
-        
+        """Непрерывная проверка через конвейер (запускается в потоке)"""
         try:
+            self.results_file = f"available_usernames_{self.start_time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+            self.sink = ResultSink(self.results_file)
+            self.log_message(f"💾 Найденные юзернеймы пишутся в {self.results_file}")
+            
+            # Приоритет применяется при старте: очередь создается вместе с конвейером
+            scorer = ValueScorer(dictionary=self.generator.popular_words) if self.prioritize_var.get() else None
+            self.pipeline = CheckPipeline(self.generator, self.parser,
+                                          category=self.current_category,
+                                          rate=self.get_rate(),
+                                          store=self.store,
+                                          scorer=scorer,
+                                          queue_size=PRIORITY_LOOKAHEAD if scorer else 200,
+                                          on_result=self.handle_result)
+            self.pipeline.start()
+            # Прогрев и keepalive расходуют тот же темп, что и проверки; прогрев идет
+            # в фоне и останавливается вместе с конвейером
+            self.parser.start_warm_up(budget=self.pipeline.rate_limiter, stop_event=self.pipeline.stop_event)
+            self.parser.start_keepalive(budget=self.pipeline.rate_limiter)
+            
             while self.running:
-                batch_count += 1
-                self.log_message(f"\n📦 БАТЧ #{batch_count}")
-                self.log_message("=" * 40)
-                
-                found = self.check_batch()
-                
-                # Обновляем статистику в UI
-                self.root.after(0, self.update_stats)
-                
-                # Очищаем историю каждые 10 батчей чтобы не засорять память
-                if batch_count % 10 == 0:
-                    self.generator.clear_used_usernames()
-                    self.log_message("🧹 История юзернеймов очищена")
-                
-                # Короткая пауза между батчами
-                time.sleep(2)
+                self.save_sweep_state()
+                time.sleep(1)
                 
         except Exception as e:
             self.log_message(f"❌ Ошибка: {e}")
         finally:
+            self.parser.stop_keepalive()
+            if self.pipeline:
+                self.pipeline.stop()
+                self.pipeline.join(5)
+            if self.sink:
+                self.sink.close()
+                self.sink = None
+            self.save_sweep_state()
             self.root.after(0, self.stop_checking)
 
 def main():
     """Запуск приложения"""
+    # Окно показывает свой журнал, в терминал - только предупреждения
+    setup_logging("WARNING")
     root = tk.Tk()
     app = UsernameCheckerApp(root)
     root.mainloop()
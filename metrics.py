@@ -0,0 +1,249 @@
+"""Метрики горячего пути: счетчики, гистограммы задержек и датчики.
+
+Каждый поток пишет в свой собственный набор счетчиков (threading.local),
+поэтому на пути запроса нет общей блокировки; snapshot() суммирует наборы
+всех потоков. Экспорт - текст Prometheus или JSON по локальному HTTP.
+"""
+import bisect
+import http.server
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Границы корзин гистограммы задержек, сек
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0)
+
+HELP = {
+    'fragment_checks_total': 'Проверки юзернеймов по исходу',
+    'fragment_check_latency_seconds': 'Время запроса страницы юзернейма',
+    'fragment_in_flight': 'Запросов в процессе выполнения',
+    'generator_candidates_total': 'Выданные генератором кандидаты',
+    'generator_attempts_total': 'Попытки генерации, включая отброшенные повторы',
+    'http_connections_opened': 'Открыто HTTP-соединений за все время',
+    'http_requests_sent': 'Запросов через пул соединений',
+    'watchlist_size': 'Имен в списке наблюдения',
+    'watchlist_lag_seconds': 'Опоздание перепроверки относительно срока',
+    'watchlist_transitions_total': 'Смены статуса наблюдаемых имен',
+}
+
+Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class _Shard:
+    """Счетчики одного потока"""
+
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters: Dict[Key, float] = {}
+        self.histograms: Dict[Key, List[float]] = {}
+
+
+class Metrics:
+    """Реестр метрик с поточными шардами"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, _Shard]] = []
+        # Итоги завершившихся потоков (пулы потоков пересоздаются на каждый батч)
+        self._retired = _Shard()
+        self._lock = threading.Lock()
+        self._gauges: Dict[Key, Callable[[], float]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Optional[Dict[str, str]]) -> Key:
+        return name, tuple(sorted(labels.items())) if labels else ()
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def inc(self, name: str, value: float = 1, labels: Optional[Dict[str, str]] = None):
+        """Увеличивает счетчик (или датчик-сумму при отрицательном value)"""
+        counters = self._shard().counters
+        key = self._key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        """Добавляет наблюдение в гистограмму"""
+        histograms = self._shard().histograms
+        key = self._key(name, labels)
+        histogram = histograms.get(key)
+        if histogram is None:
+            # корзины..., +Inf, сумма
+            histogram = histograms[key] = [0] * (len(self.buckets) + 2)
+        histogram[bisect.bisect_left(self.buckets, value)] += 1
+        histogram[-1] += value
+
+    def register_gauge(self, name: str, callback: Callable[[], float],
+                       labels: Optional[Dict[str, str]] = None):
+        """Датчик, значение которого читается в момент снимка"""
+        self._gauges[self._key(name, labels)] = callback
+
+    def unregister_gauge(self, name: str, labels: Optional[Dict[str, str]] = None):
+        self._gauges.pop(self._key(name, labels), None)
+
+    def _collect(self) -> _Shard:
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge(self._retired, shard)
+            self._shards = alive
+            total = _Shard()
+            self._merge(total, self._retired)
+            for _, shard in alive:
+                self._merge(total, shard)
+        return total
+
+    @staticmethod
+    def _merge(target: _Shard, source: _Shard):
+        # dict()/list() копируют атомарно под GIL, пока поток-владелец пишет
+        for key, value in dict(source.counters).items():
+            target.counters[key] = target.counters.get(key, 0) + value
+        for key, histogram in dict(source.histograms).items():
+            histogram = list(histogram)
+            current = target.histograms.get(key)
+            if current is None:
+                target.histograms[key] = histogram
+            else:
+                target.histograms[key] = [a + b for a, b in zip(current, histogram)]
+
+    def snapshot(self) -> Dict:
+        """Текущие значения всех метрик"""
+        total = self._collect()
+        gauges = {}
+        for key, callback in list(self._gauges.items()):
+            try:
+                gauges[key] = float(callback())
+            except Exception:
+                continue
+        return {
+            'counters': [{'name': k[0], 'labels': dict(k[1]), 'value': v} for k, v in total.counters.items()],
+            'histograms': [
+                {'name': k[0], 'labels': dict(k[1]), 'buckets': list(self.buckets),
+                 'counts': h[:-1], 'count': sum(h[:-1]), 'sum': h[-1]}
+                for k, h in total.histograms.items()
+            ],
+            'gauges': [{'name': k[0], 'labels': dict(k[1]), 'value': v} for k, v in gauges.items()],
+        }
+
+    def counter(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        return self._collect().counters.get(self._key(name, labels), 0)
+
+    def counters_by_label(self, name: str, label: str) -> Dict[str, float]:
+        """Значения счетчика name в разрезе одной метки"""
+        result: Dict[str, float] = {}
+        for (metric, labels), value in self._collect().counters.items():
+            if metric == name:
+                label_value = dict(labels).get(label, '')
+                result[label_value] = result.get(label_value, 0) + value
+        return result
+
+    def quantile(self, name: str, q: float, labels: Optional[Dict[str, str]] = None) -> float:
+        """Оценка квантиля по корзинам гистограммы (верхняя граница корзины)"""
+        histogram = self._collect().histograms.get(self._key(name, labels))
+        if not histogram:
+            return 0.0
+        counts = histogram[:-1]
+        target = q * sum(counts)
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target and count:
+                return self.buckets[index] if index < len(self.buckets) else float('inf')
+        return 0.0
+
+    def render_prometheus(self) -> str:
+        """Снимок в текстовом формате Prometheus"""
+        snapshot = self.snapshot()
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        def fmt_labels(labels: Dict[str, str], extra: str = '') -> str:
+            parts = [f'{k}="{v}"' for k, v in sorted(labels.items())]
+            if extra:
+                parts.append(extra)
+            return '{' + ','.join(parts) + '}' if parts else ''
+
+        for item in sorted(snapshot['counters'], key=lambda i: i['name']):
+            kind = 'counter' if item['name'].endswith('_total') else 'gauge'
+            describe(item['name'], kind)
+            lines.append(f"{item['name']}{fmt_labels(item['labels'])} {item['value']:g}")
+
+        for item in snapshot['gauges']:
+            describe(item['name'], 'gauge')
+            lines.append(f"{item['name']}{fmt_labels(item['labels'])} {item['value']:g}")
+
+        for item in snapshot['histograms']:
+            name = item['name']
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(list(item['buckets']) + ['+Inf'], item['counts']):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{name}_bucket{fmt_labels(item['labels'], le)} {cumulative}")
+            lines.append(f"{name}_sum{fmt_labels(item['labels'])} {item['sum']:g}")
+            lines.append(f"{name}_count{fmt_labels(item['labels'])} {item['count']}")
+
+        return '\n'.join(lines) + '\n'
+
+
+# Общий реестр процесса
+METRICS = Metrics()
+
+
+class MetricsServer:
+    """Локальный HTTP: /metrics (Prometheus) и /metrics.json"""
+
+    def __init__(self, port: int = 9090, host: str = "127.0.0.1", metrics: Metrics = METRICS):
+        registry = metrics
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = registry.render_prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> 'MetricsServer':
+        threading.Thread(target=self.server.serve_forever, name="metrics-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
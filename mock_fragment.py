@@ -0,0 +1,384 @@
+"""Локальная имитация fragment.com для бенчмарков и ручных проверок.
+
+    python -m mock_fragment --port 8080 --latency 0.08 --error-rate 0.01 --throttle 200
+
+Свободно ли имя, определяется детерминированно по crc32 имени, поэтому
+разные движки на одних и тех же именах получают одинаковые ответы.
+
+Поисковая выдача по запросам из fixtures/listings.json отдается из
+записанных страниц, по остальным - синтетическая. Снять страницы с сайта
+и сверить с ними разбор выдачи:
+
+    python -m mock_fragment --record durov
+    python -m mock_fragment --check-fixtures
+"""
+import argparse
+import gzip
+import http.server
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from ratelimit import TokenBucket
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>@{username} - Fragment</title>
+<script>{script}</script>
+</head>
+<body>
+<header class="tm-header"><div class="tm-header-logo">Fragment</div></header>
+<main class="tm-main">
+<section class="tm-section">
+<div class="tm-section-header">
+<h2 class="tm-section-header-domain">@{username}</h2>
+<span class="tm-section-header-status {status_class}">{status}</span>
+</div>
+{body}
+</section>
+</main>
+</body>
+</html>
+"""
+
+LISTING_ROW = (
+    '<tr class="tm-row-selectable"><td><a href="/username/{username}">'
+    '<div class="table-cell-value tm-value">@{username}</div></a></td>'
+    '<td><div class="table-cell-status-thin {status_class}">{status}</div></td></tr>'
+)
+
+EMPTY_LISTING = '<html><body><table class="tm-table"><tbody></tbody></table></body></html>'
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURES_MANIFEST = 'listings.json'
+
+
+def load_fixtures(directory: str = FIXTURES_DIR) -> List[Dict]:
+    """Записанные страницы выдачи из манифеста (пусто, если его нет)"""
+    path = os.path.join(directory, FIXTURES_MANIFEST)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        pages = json.load(f)['pages']
+    for page in pages:
+        with open(os.path.join(directory, page['file']), 'r', encoding='utf-8') as f:
+            page['html'] = f.read()
+    return pages
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    # Стандартная очередь на 5 соединений дает секундные SYN-повторы под нагрузкой
+    request_queue_size = 1024
+
+
+class MockFragmentServer:
+    """HTTP-сервер с настраиваемыми задержками, ошибками и троттлингом 429"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.05, jitter: float = 0.5, distribution: str = "lognormal",
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 1.0,
+                 available_ratio: float = 0.05, page_size: int = 30000, compress: bool = True,
+                 listing_page_size: int = 20, listing_pages: int = 3, fixtures: Optional[str] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.available_ratio = available_ratio
+        self.page_size = page_size
+        self.compress = compress
+        self.listing_page_size = listing_page_size
+        self.listing_pages = listing_pages
+        self.throttle = TokenBucket(throttle_rate) if throttle_rate else None
+        # Записанные страницы выдачи: (запрос, offset) -> HTML
+        self.recorded: Dict[Tuple[str, int], str] = {
+            (page['query'], page['offset']): page['html'] for page in (load_fixtures(fixtures) if fixtures else [])
+        }
+        self.recorded_queries = {query for query, _ in self.recorded}
+
+        self.stats: Dict[str, int] = {'requests': 0, 'ok': 0, 'errors': 0, 'throttled': 0}
+        self.stats_lock = threading.Lock()
+        self.padding = self._make_padding(page_size)
+
+        self.server = _Server((host, port), self._handler_class())
+        # Обрывы соединений клиентом при раннем выходе - норма, не шумим
+        self.server.handle_error = lambda request, client_address: None
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def _make_padding(size: int) -> str:
+        rng = random.Random(0)
+        words = ['tm-table', 'tm-row', 'js-auction', 'data-value', 'ton', 'bid', 'owner', 'history']
+        chunks = []
+        total = 0
+        while total < size:
+            chunk = f'<div class="{rng.choice(words)}">{rng.choice(words)} {rng.randrange(10 ** 6)}</div>\n'
+            chunks.append(chunk)
+            total += len(chunk)
+        return ''.join(chunks)
+
+    def is_available(self, username: str) -> bool:
+        return zlib.crc32(username.encode()) % 10000 < self.available_ratio * 10000
+
+    def _delay(self) -> float:
+        if self.distribution == "constant":
+            return self.latency
+        if self.distribution == "uniform":
+            return random.uniform(self.latency * (1 - self.jitter), self.latency * (1 + self.jitter))
+        # Логнормальное: медиана latency, длинный правый хвост как в реальной сети
+        return random.lognormvariate(0, self.jitter) * self.latency
+
+    def _count(self, key: str):
+        with self.stats_lock:
+            self.stats['requests'] += 1
+            self.stats[key] += 1
+
+    def render_username_page(self, username: str) -> str:
+        if self.is_available(username):
+            status, status_class = 'Unavailable', 'tm-status-unavail'
+        else:
+            status, status_class = 'Taken', 'tm-status-taken'
+        half = len(self.padding) // 2
+        return PAGE_TEMPLATE.format(username=username, status=status, status_class=status_class,
+                                    script=self.padding[:half], body=self.padding[half:])
+
+    def render_listing_page(self, query: str, offset: int) -> str:
+        if query in self.recorded_queries:
+            # За последней записанной страницей выдача пуста
+            return self.recorded.get((query, offset), EMPTY_LISTING)
+        total = self.listing_page_size * self.listing_pages
+        rows = []
+        for i in range(offset, min(offset + self.listing_page_size, total)):
+            username = f"{query}{i:03d}"
+            if self.is_available(username):
+                status, status_class = 'Unavailable', 'tm-status-unavail'
+            else:
+                status, status_class = 'Sold', 'tm-status-sold'
+            rows.append(LISTING_ROW.format(username=username, status=status, status_class=status_class))
+        return f"<html><body><table class=\"tm-table\">{''.join(rows)}</table></body></html>"
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, code: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+                self.send_response(code)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                if mock.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=5)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except OSError:
+                    pass
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path == '/__stats':
+                    with mock.stats_lock:
+                        body = json.dumps(mock.stats).encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                if mock.throttle is not None and mock.throttle.try_acquire() > 0:
+                    mock._count('throttled')
+                    self._send(429, b'Too Many Requests', {'Retry-After': str(mock.retry_after)})
+                    return
+
+                time.sleep(mock._delay())
+
+                if mock.error_rate and random.random() < mock.error_rate:
+                    mock._count('errors')
+                    self._send(random.choice((500, 502, 503)), b'Server Error')
+                    return
+
+                parsed = urllib.parse.urlparse(self.path)
+                if parsed.path.startswith('/username/'):
+                    username = parsed.path.rsplit('/', 1)[-1]
+                    body = mock.render_username_page(username)
+                elif parsed.path == '/':
+                    params = urllib.parse.parse_qs(parsed.query)
+                    query = params.get('query', [''])[0]
+                    offset = int(params.get('offset', ['0'])[0])
+                    body = mock.render_listing_page(query, offset)
+                else:
+                    mock._count('errors')
+                    self._send(404, b'Not Found')
+                    return
+
+                mock._count('ok')
+                self._send(200, body.encode('utf-8'))
+
+        return Handler
+
+    def start(self) -> 'MockFragmentServer':
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mock-fragment", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> 'MockFragmentServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def record_listing(query: str, directory: str = FIXTURES_DIR, base_url: str = "https://fragment.com",
+                   max_pages: int = 3) -> int:
+    """Снимает страницы выдачи с сайта в directory и записывает их в манифест.
+
+    Ожидаемые статусы берутся из разбора текущим парсером - их нужно сверить
+    со страницей глазами, прежде чем коммитить. Возвращает число страниц
+    """
+    from parser import FragmentParser
+
+    path = os.path.join(directory, FIXTURES_MANIFEST)
+    manifest = {'pages': []}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    manifest['pages'] = [page for page in manifest['pages'] if page['query'] != query]
+
+    fragment = FragmentParser(base_url=base_url)
+    offset = 0
+    recorded = 0
+    try:
+        for page in range(max_pages):
+            # Пагинация - та же, что у FragmentParser.search_usernames
+            params = {'query': query, 'offset': offset} if page else {'query': query}
+            response = fragment.session.get(base_url + '/', params=params, timeout=15)
+            response.raise_for_status()
+            rows = fragment._parse_listing_page(response.text, 0.0)
+            filename = f"listing_{query}_{offset}.html" if page else f"listing_{query}.html"
+            with open(os.path.join(directory, filename), 'w', encoding='utf-8') as f:
+                f.write(response.text)
+            manifest['pages'].append({
+                'query': query,
+                'offset': offset,
+                'file': filename,
+                'source': f"{response.url}, {datetime.now(timezone.utc):%Y-%m-%d}",
+                'expected': {row['username']: row['status'] for row in rows},
+            })
+            recorded += 1
+            if not rows:
+                break
+            offset += len(rows)
+    finally:
+        fragment.close()
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.write('\n')
+    return recorded
+
+
+def check_fixtures(directory: str = FIXTURES_DIR) -> int:
+    """Разбирает записанные страницы через мок парсером и сверяет статусы с манифестом.
+    Возвращает код выхода: 0 - все совпало"""
+    from parser import FragmentParser
+
+    pages = load_fixtures(directory)
+    if not pages:
+        print(f"⚠️ Нет записанных страниц в {directory}", file=sys.stderr)
+        return 1
+
+    expected: Dict[str, Dict[str, str]] = {}
+    for page in pages:
+        expected.setdefault(page['query'], {}).update(page['expected'])
+
+    failures = 0
+    with MockFragmentServer(latency=0.0, compress=False, fixtures=directory) as mock:
+        fragment = FragmentParser(base_url=mock.url)
+        try:
+            for query, statuses in expected.items():
+                found = {result['username']: result['status'] for result in fragment.search_usernames(query)}
+                if found == statuses:
+                    print(f"✅ {query}: {len(found)} юзернеймов совпало", file=sys.stderr)
+                    continue
+                failures += 1
+                for username in sorted(set(found) | set(statuses)):
+                    if found.get(username) != statuses.get(username):
+                        print(f"❌ {query}: {username} - ожидалось {statuses.get(username)}, "
+                              f"разобрано {found.get(username)}", file=sys.stderr)
+        finally:
+            fragment.close()
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m mock_fragment", description="Локальная имитация fragment.com")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.05, help="медианная задержка, сек")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--distribution", choices=["lognormal", "uniform", "constant"], default="lognormal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 5xx")
+    parser.add_argument("--throttle", type=float, default=0.0, help="запросов/сек до ответов 429 (0 - без троттлинга)")
+    parser.add_argument("--available-ratio", type=float, default=0.05)
+    parser.add_argument("--page-size", type=int, default=30000, help="примерный размер страницы, байт")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="каталог записанных страниц выдачи")
+    parser.add_argument("--record", metavar="QUERY", help="снять выдачу по запросу с fragment.com в --fixtures и выйти")
+    parser.add_argument("--record-pages", type=int, default=3)
+    parser.add_argument("--check-fixtures", action="store_true",
+                        help="сверить разбор записанных страниц с ожидаемыми статусами и выйти")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        pages = record_listing(args.record, args.fixtures, max_pages=args.record_pages)
+        print(f"💾 Записано страниц: {pages} -> {args.fixtures}", file=sys.stderr)
+        return 0
+    if args.check_fixtures:
+        return check_fixtures(args.fixtures)
+
+    mock = MockFragmentServer(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                              distribution=args.distribution, error_rate=args.error_rate,
+                              throttle_rate=args.throttle, available_ratio=args.available_ratio,
+                              page_size=args.page_size, fixtures=args.fixtures)
+    # Первая строка stdout - адрес сервера (нужно бенчмарку при --port 0)
+    print(mock.url, flush=True)
+    print(f"🧪 Mock Fragment: {mock.url}", file=sys.stderr)
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,86 @@
+import asyncio
+import itertools
+import logging
 import requests
+import urllib3
 import concurrent.futures
+import sys
+import threading
 import time
-from typing import Dict, List
-from bs4 import BeautifulSoup
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from connections import ConnectionCounter, CountingAdapter
+from metrics import METRICS
+from proxies import ProxyPool
+from results import CANCELLED, CheckResult, ResultBatch, http_status
+from ratelimit import AdaptiveLimiter, TokenBucket, parse_retry_after
+
+# Построчные результаты - DEBUG, итоги батчей - INFO
+logger = logging.getLogger(__name__)
+
+class StatusScanner:
+    """Поиск статуса в потоке байт страницы без декодирования всего HTML.
+
+    feed() возвращает True, как только встретился маркер Unavailable, и False,
+    когда блок статуса в шапке страницы прочитан целиком без него. None -
+    нужно читать дальше. Если шапки нет, решение принимается по всему телу,
+    как в полной проверке.
+    """
+
+    AVAILABLE_MARKER = b'Unavailable'
+    HEADER_MARKER = b'tm-section-header-status'
+    HEADER_END = b'</span>'
+    TAIL = max(len(AVAILABLE_MARKER), len(HEADER_MARKER)) - 1
 
-class FragmentParser:
     def __init__(self):
-        self.base_url = "https://fragment.com"
+        self.tail = b''
+        self.header = None
+        self.result = None
+
+    def feed(self, chunk: bytes) -> Optional[bool]:
+        if self.result is not None:
+            return self.result
+
+        data = self.tail + chunk
+        if self.AVAILABLE_MARKER in data:
+            self.result = True
+            return True
+
+        if self.header is None:
+            index = data.find(self.HEADER_MARKER)
+            if index >= 0:
+                self.header = data[index:]
+        else:
+            self.header += chunk
+
+        if self.header is not None and self.HEADER_END in self.header:
+            # Статус в шапке прочитан и это не Unavailable
+            self.result = False
+            return False
+
+        self.tail = data[-self.TAIL:]
+        return None
+
+    def finish(self) -> bool:
+        """Итог после конца тела: Unavailable так и не встретился - занят"""
+        return bool(self.result)
+
+
+class FragmentParser:
+    # Размер порции при потоковом чтении страницы
+    CHUNK_SIZE = 4096
+    # Остаток тела до такого размера дочитывается, чтобы соединение вернулось
+    # в пул; ответ больше - дешевле бросить вместе с соединением
+    DRAIN_LIMIT = 256 * 1024
+    # Соединений в пуле по умолчанию (у requests - 10, меньше числа потоков)
+    DEFAULT_POOL_SIZE = 15
+
+
+    def __init__(self, limiter: Optional[AdaptiveLimiter] = None, base_url: str = "https://fragment.com",
+                 pool_size: Optional[int] = None, sessions: int = 1,
+                 proxies: Optional[ProxyPool] = None):
+        # base_url можно подменить на локальный тестовый сервер
+        self.base_url = base_url.rstrip('/')
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -14,118 +88,419 @@ class FragmentParser:
             'Accept-Encoding': 'gzip, deflate',
             'Connection': 'keep-alive',
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Регулятор одновременных запросов (None - без регулирования)
+        self.limiter = limiter
+        
+        # Пул соединений рассчитан на весь параллелизм, иначе лишние соединения
+        # закрываются после каждого запроса и следующий открывает новое (и TLS заново).
+        # Несколько сессий делят пул поровну, каждый поток закреплен за одной из них
+        if pool_size is None:
+            pool_size = max(self.DEFAULT_POOL_SIZE, limiter.max_limit if limiter else 0)
+        self.pool_size = 0
+        # Реально открытые сокеты прямых сессий, включая переподключения
+        self.connections = ConnectionCounter()
+        self.sessions: List[requests.Session] = []
+        for _ in range(max(1, sessions)):
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self.sessions.append(session)
+        self.session = self.sessions[0]
+        # Пул прокси: проверки идут через сессии прокси, а не напрямую
+        self.proxies = proxies
+        if proxies is not None:
+            for session in proxies.sessions:
+                session.headers.update(self.headers)
+        self.ensure_pool_size(pool_size)
+        
+        self._session_order = itertools.count()
+        self._local = threading.local()
+        self._keepalive_stop: Optional[threading.Event] = None
+        # Когда ушел последний запрос проверки (time.monotonic)
+        self.last_activity = 0.0
+
+    def ensure_pool_size(self, concurrency: int):
+        """Увеличивает пулы сессий под concurrency одновременных запросов"""
+        if concurrency <= self.pool_size:
+            return
+        self.pool_size = concurrency
+        if self.proxies is not None:
+            self.proxies.ensure_pool_size(concurrency)
+        per_session = -(-concurrency // len(self.sessions))
+        for session in self.sessions:
+            adapter = CountingAdapter(self.connections, pool_connections=4, pool_maxsize=per_session)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+    def _session(self) -> requests.Session:
+        """Сессия, закрепленная за текущим потоком (по кругу между сессиями)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self.sessions[next(self._session_order) % len(self.sessions)]
+        return session
+
+    def warm_up(self, connections: Optional[int] = None, budget: Optional[TokenBucket] = None,
+                stop_event: Optional[threading.Event] = None) -> int:
+        """Заранее открывает keep-alive соединения параллельными HEAD-запросами.
+
+        Уже открытые соединения при этом переиспользуются и не дают серверу
+        закрыть их по простою. Каждый HEAD расходует тот же бюджет, что и
+        проверка: токен budget (темп конвейера), слот регулятора и бюджет
+        прокси, поэтому прогрев не обходит лимиты и паузы Retry-After.
+        Токенов budget прогрев не ждет: соединений не больше запаса бакета,
+        а на что токена не нашлось, то пропускается.
+        Возвращает число успешных запросов.
+        """
+        sessions = self._egress_sessions()
+        connections = min(connections or self.pool_size, self.pool_size)
+        if budget is not None and not budget.unlimited:
+            connections = min(connections, max(1, int(budget.capacity)))
+        per_session = -(-connections // len(sessions))
+        targets = [session for session in sessions for _ in range(per_session)]
+
+        def touch(session: requests.Session) -> bool:
+            if budget is not None and budget.try_acquire() > 0:
+                return False
+            if self.limiter is not None and not self.limiter.acquire(stop_event):
+                return False
+            proxy = None
+            try:
+                if self.proxies is not None:
+                    # Прокси выбирается по бюджету, как для проверки
+                    proxy = self.proxies.acquire(stop_event)
+                    if proxy is None:
+                        return False
+                    session = proxy.session
+                session.head(self.base_url + '/', timeout=5).close()
+                return True
+            except requests.exceptions.RequestException:
+                return False
+            finally:
+                if proxy is not None:
+                    self.proxies.release(proxy, None)
+                if self.limiter is not None:
+                    self.limiter.release(None)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            opened = sum(executor.map(touch, targets))
+        logger.debug("🔌 Прогрето соединений: %d/%d", opened, len(targets))
+        return opened
+
+    def start_warm_up(self, budget: Optional[TokenBucket] = None,
+                      stop_event: Optional[threading.Event] = None) -> threading.Thread:
+        """warm_up в фоне: первая проверка не ждет прогрева, stop_event прерывает его"""
+        thread = threading.Thread(target=self.warm_up, kwargs={'budget': budget, 'stop_event': stop_event},
+                                  name="http-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def start_keepalive(self, interval: float = 30.0, budget: Optional[TokenBucket] = None):
+        """Фоновый поток, который держит соединения пула открытыми между батчами.
+
+        Пока идут проверки, соединения живы и так, а HEAD под нагрузкой открыл
+        бы соединение сверх пула, которое urllib3 тут же выбросит. Поэтому
+        прогреваются только простаивающие соединения и только если за
+        interval не было ни одной проверки. budget - токен-бакет темпа проверок
+        """
+        if self._keepalive_stop is not None:
+            return
+        stop_event = self._keepalive_stop = threading.Event()
+
+        def keepalive():
+            while not stop_event.wait(interval):
+                if time.monotonic() - self.last_activity < interval:
+                    continue
+                idle = self._idle_connections()
+                if idle:
+                    self.warm_up(idle, budget=budget, stop_event=stop_event)
+
+        threading.Thread(target=keepalive, name="http-keepalive", daemon=True).start()
+
+    def stop_keepalive(self):
+        if self._keepalive_stop is not None:
+            self._keepalive_stop.set()
+            self._keepalive_stop = None
+
+    def _egress_sessions(self) -> List[requests.Session]:
+        """Сессии, через которые реально уходят проверки"""
+        return self.proxies.sessions if self.proxies is not None else self.sessions
+
+    def _connection_pools(self) -> list:
+        """Пулы соединений urllib3 всех исходящих сессий"""
+        result = []
+        seen = set()
+        for session in self._egress_sessions():
+            for adapter in session.adapters.values():
+                if id(adapter) in seen:
+                    continue
+                seen.add(id(adapter))
+                # Прямые соединения и соединения через прокси живут в разных менеджерах
+                for manager in [adapter.poolmanager, *adapter.proxy_manager.values()]:
+                    pools = manager.pools
+                    for key in pools.keys():
+                        pool = pools.get(key)
+                        if pool is not None:
+                            result.append(pool)
+        return result
+
+    def _idle_connections(self) -> int:
+        """Открытых соединений, которые сейчас лежат в пулах без дела"""
+        # В очереди пула свободные места помечены None
+        return sum(1 for pool in self._connection_pools() for conn in list(pool.pool.queue) if conn is not None)
+
+    def pool_stats(self) -> Dict[str, float]:
+        """Сколько сокетов открыто (с переподключениями) и сколько запросов прошло через пулы"""
+        counter = self.proxies.connections if self.proxies is not None else self.connections
+        requests_sent = sum(pool.num_requests for pool in self._connection_pools())
+        connections = counter.value
+        return {
+            'connections': connections,
+            'requests': requests_sent,
+            # Доля запросов, ушедших по уже открытому соединению
+            'reuse_ratio': max(0.0, 1 - connections / requests_sent) if requests_sent else 0.0,
+        }
+
+    def close(self):
+        self.stop_keepalive()
+        for session in self.sessions:
+            session.close()
+        if self.proxies is not None:
+            self.proxies.close()
+
+    def check_username_status(self, username: str,
+                              stop_event: Optional[threading.Event] = None) -> CheckResult:
+        """Проверяет доступность на Fragment - ищет только статус Unavailable.
+
+        stop_event прерывает ожидание слота регулятора и бюджета прокси -
+        тогда запрос не отправляется и возвращается результат Cancelled
+        """
+        if self.limiter is not None and not self.limiter.acquire(stop_event):
+            return CheckResult(username, CANCELLED, False, False, base_url=self.base_url)
+        
+        proxy = None
+        if self.proxies is not None:
+            proxy = self.proxies.acquire(stop_event)
+            if proxy is None:
+                if self.limiter is not None:
+                    self.limiter.release(None)
+                return CheckResult(username, CANCELLED, False, False, base_url=self.base_url)
+        METRICS.inc('fragment_in_flight')
+        result = None
+        try:
+            result = self._request_username_status(username, proxy.session if proxy else None)
+            return result
+        finally:
+            METRICS.inc('fragment_in_flight', -1)
+            if result is not None:
+                self._record_metrics(result)
+            if proxy is not None:
+                self.proxies.release(proxy, result)
+            if self.limiter is not None:
+                self.limiter.release(result)
+
+    @staticmethod
+    def _record_metrics(result: CheckResult):
+        """Счетчик исхода и гистограмма задержки для одного результата"""
+        METRICS.inc('fragment_checks_total', labels={'outcome': result.status})
+        METRICS.observe('fragment_check_latency_seconds', result.elapsed)
 
-    def check_username_status(self, username: str) -> Dict:
-        """Проверяет доступность на Fragment - ищет только статус Unavailable"""
+    def _request_username_status(self, username: str, session: Optional[requests.Session] = None) -> CheckResult:
+        """Один запрос страницы юзернейма (session - сессия прокси, если он выбран)"""
         url = f"{self.base_url}/username/{username}"
+        start_time = time.time()
+        self.last_activity = time.monotonic()
         
         try:
-            start_time = time.time()
-            response = self.session.get(url, headers=self.headers, timeout=8)
-            request_time = time.time() - start_time
+            # Тело разбираем потоком и перестаем, как только статус понятен;
+            # остаток только дочитывается без разбора, чтобы соединение не закрылось
+            with (session or self._session()).get(url, timeout=8, stream=True) as response:
+                unavailable = False
+                if response.status_code == 200:
+                    scanner = StatusScanner()
+                    for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                        if scanner.feed(chunk) is not None:
+                            break
+                    unavailable = scanner.finish()
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                request_time = time.time() - start_time
+                self._drain(response)
             
-            if response.status_code == 200:
-                html = response.text
-                
-                # ПРОСТАЯ ПРОВЕРКА: ищем только статус Unavailable
-                if 'Unavailable' in html:
-                    status = 'Available'
-                    reason = 'Свободен (Unavailable)'
-                    available = True
-                    print(f"   ✅ {username} - СВОБОДЕН ({request_time:.1f}s)")
-                else:
-                    status = 'Taken'
-                    reason = 'Занят (не Unavailable)'
-                    available = False
-                    print(f"   ❌ {username} - ЗАНЯТ ({request_time:.1f}s)")
-                
-                result = {
-                    'username': username,
-                    'status': status,
-                    'reason': reason,
-                    'available': available,
-                    'url': url,
-                    'response_time': round(request_time, 2),
-                    'success': True
-                }
-                
-                return result
-                
-            elif response.status_code == 404:
-                # 404 обычно означает что юзернейм свободен
-                result = {
-                    'username': username,
-                    'status': 'Available',
-                    'reason': 'Страница не найдена (404)',
-                    'available': True,
-                    'url': url,
-                    'response_time': round(request_time, 2),
-                    'success': True
-                }
-                print(f"   ✅ {username} - СВОБОДЕН (404) ({request_time:.1f}s)")
-                return result
-                
-            else:
-                result = {
-                    'username': username,
-                    'status': f'HTTP {response.status_code}',
-                    'reason': f'Ошибка HTTP: {response.status_code}',
-                    'available': False,
-                    'url': url,
-                    'response_time': round(request_time, 2),
-                    'success': False
-                }
-                print(f"   ❌ {username} - Ошибка HTTP {response.status_code} ({request_time:.1f}s)")
-                return result
+            return self._build_result(username, response.status_code, unavailable, request_time, retry_after)
                 
         except requests.exceptions.Timeout:
-            result = {
-                'username': username,
-                'status': 'Timeout',
-                'reason': 'Таймаут запроса',
-                'available': False,
-                'url': url,
-                'response_time': 0,
-                'success': False
-            }
-            print(f"   ⚠️ {username} - Таймаут запроса")
-            return result
+            logger.debug("   ⚠️ %s - Таймаут запроса", username)
+            return CheckResult(username, 'Timeout', False, False, time.time() - start_time,
+                               base_url=self.base_url)
             
         except requests.exceptions.ConnectionError:
-            result = {
-                'username': username,
-                'status': 'ConnectionError',
-                'reason': 'Ошибка подключения',
-                'available': False,
-                'url': url,
-                'response_time': 0,
-                'success': False
-            }
-            print(f"   ⚠️ {username} - Ошибка подключения")
-            return result
+            logger.debug("   ⚠️ %s - Ошибка подключения", username)
+            return CheckResult(username, 'ConnectionError', False, False, time.time() - start_time,
+                               base_url=self.base_url)
             
         except Exception as e:
-            result = {
-                'username': username,
-                'status': f'Error: {type(e).__name__}',
-                'reason': f'Ошибка: {str(e)}',
-                'available': False,
-                'url': url,
-                'response_time': 0,
-                'success': False
-            }
-            print(f"   ⚠️ {username} - Ошибка: {type(e).__name__}")
-            return result
+            logger.debug("   ⚠️ %s - Ошибка: %s", username, type(e).__name__)
+            return CheckResult(username, f'Error: {type(e).__name__}', False, False, time.time() - start_time,
+                               base_url=self.base_url, detail=f'Ошибка: {str(e)}')
+
+    def _drain(self, response: requests.Response) -> bool:
+        """Дочитывает остаток тела (не больше DRAIN_LIMIT) и возвращает соединение в пул.
+        False - тело слишком большое, соединение закроется при выходе из with"""
+        length = response.headers.get('Content-Length')
+        if length is not None and length.isdigit() and int(length) > self.DRAIN_LIMIT:
+            return False
+        raw = response.raw
+        remaining = self.DRAIN_LIMIT
+        try:
+            while remaining > 0:
+                # decode_content=True: urllib3 не дает сменить режим после iter_content
+                chunk = raw.read(self.CHUNK_SIZE * 4, decode_content=True)
+                if not chunk:
+                    raw.release_conn()
+                    return True
+                remaining -= len(chunk)
+        except (requests.exceptions.RequestException, OSError, urllib3.exceptions.HTTPError):
+            pass
+        return False
+
+    async def _drain_async(self, response: 'aiohttp.ClientResponse') -> bool:
+        """То же для aiohttp: дочитанный ответ отпускает соединение обратно в пул"""
+        import aiohttp
+
+        if (response.content_length or 0) > self.DRAIN_LIMIT:
+            return False
+        remaining = self.DRAIN_LIMIT
+        try:
+            while remaining > 0:
+                chunk = await response.content.readany()
+                if not chunk:
+                    return True
+                remaining -= len(chunk)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+        return False
+
+    def _build_result(self, username: str, status_code: int, unavailable: bool, request_time: float,
+                      retry_after: Optional[float] = None) -> CheckResult:
+        """Формирует результат проверки по коду ответа и найденному статусу.
+
+        retry_after - сервер просит подождать (429/503), учитывается регулятором
+        """
+        if status_code == 200:
+            # ПРОСТАЯ ПРОВЕРКА: ищем только статус Unavailable
+            if unavailable:
+                status = 'Available'
+                available = True
+                logger.debug("   ✅ %s - СВОБОДЕН (%.1fs)", username, request_time)
+            else:
+                status = 'Taken'
+                available = False
+                logger.debug("   ❌ %s - ЗАНЯТ (%.1fs)", username, request_time)
+            success = True
+
+        elif status_code == 404:
+            # 404 обычно означает что юзернейм свободен
+            status = 'Available'
+            available = True
+            success = True
+            logger.debug("   ✅ %s - СВОБОДЕН (404) (%.1fs)", username, request_time)
 
-    def check_usernames_batch(self, usernames: List[str], max_workers: int = 15) -> List[Dict]:
+        else:
+            status = http_status(status_code)
+            available = False
+            success = False
+            logger.debug("   ❌ %s - Ошибка HTTP %s (%.1fs)", username, status_code, request_time)
+
+        return CheckResult(username, status, available, success, request_time,
+                           code=status_code, retry_after=retry_after, base_url=self.base_url)
+
+    async def _check_username_async(self, session: 'aiohttp.ClientSession', username: str) -> CheckResult:
+        """Асинхронная проверка одного юзернейма через общую сессию aiohttp"""
+        METRICS.inc('fragment_in_flight')
+        try:
+            result = await self._request_username_async(session, username)
+        finally:
+            METRICS.inc('fragment_in_flight', -1)
+        self._record_metrics(result)
+        return result
+
+    async def _request_username_async(self, session: 'aiohttp.ClientSession', username: str) -> CheckResult:
+        """Один асинхронный запрос страницы юзернейма"""
+        import aiohttp
+        
+        url = f"{self.base_url}/username/{username}"
+        start_time = time.time()
+        self.last_activity = time.monotonic()
+
+        try:
+            async with session.get(url) as response:
+                unavailable = False
+                if response.status == 200:
+                    scanner = StatusScanner()
+                    async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                        if scanner.feed(chunk) is not None:
+                            break
+                    unavailable = scanner.finish()
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                request_time = time.time() - start_time
+                await self._drain_async(response)
+            return self._build_result(username, response.status, unavailable, request_time, retry_after)
+
+        except asyncio.TimeoutError:
+            logger.debug("   ⚠️ %s - Таймаут запроса", username)
+            return CheckResult(username, 'Timeout', False, False, time.time() - start_time,
+                               base_url=self.base_url)
+
+        except aiohttp.ClientConnectionError:
+            logger.debug("   ⚠️ %s - Ошибка подключения", username)
+            return CheckResult(username, 'ConnectionError', False, False, time.time() - start_time,
+                               base_url=self.base_url)
+
+        except Exception as e:
+            logger.debug("   ⚠️ %s - Ошибка: %s", username, type(e).__name__)
+            return CheckResult(username, f'Error: {type(e).__name__}', False, False, time.time() - start_time,
+                               base_url=self.base_url, detail=f'Ошибка: {str(e)}')
+
+    async def check_usernames_async(self, usernames: Iterable[str], concurrency: int = 100) -> AsyncIterator[CheckResult]:
+        """Асинхронная проверка: одна сессия, пул соединений и семафор на concurrency запросов.
+
+        Результаты отдаются по мере готовности, входной итератор читается лениво.
+        """
+        # aiohttp нужен только этому движку - не грузим его при обычном импорте
+        import aiohttp
+        
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=8)
+        semaphore = asyncio.Semaphore(concurrency)
+        pending = set()
+
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+            for username in usernames:
+                # Ждем свободный слот, прежде чем брать следующий юзернейм
+                await semaphore.acquire()
+                task = asyncio.ensure_future(self._check_username_async(session, username))
+                task.add_done_callback(lambda _: semaphore.release())
+                pending.add(task)
+
+                done = [t for t in pending if t.done()]
+                for t in done:
+                    pending.discard(t)
+                    yield t.result()
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    yield t.result()
+
+    def check_usernames_batch(self, usernames: List[str], max_workers: int = 15) -> List[CheckResult]:
         """Многопоточная проверка юзернеймов"""
+        if self.limiter is not None:
+            # Параллелизм задает регулятор, потоков нужно не меньше его максимума
+            max_workers = max(max_workers, self.limiter.max_limit)
+        self.ensure_pool_size(max_workers)
+        
         start_time = time.time()
         results = []
         
-        print(f"🔍 Проверка {len(usernames)} юзернеймов:")
-        print("─" * 60)
+        logger.info("🔍 Проверка %d юзернеймов:", len(usernames))
         
         with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
             # Отправляем все задачи
@@ -148,27 +523,92 @@ class FragmentParser:
                         elapsed = time.time() - start_time
                         speed = completed / (elapsed / 60)
                         percent = (completed / len(usernames)) * 100
-                        print(f"   📊 Прогресс: {completed}/{len(usernames)} ({percent:.0f}%) | Скорость: {speed:.0f}/мин")
+                        logger.debug("   📊 Прогресс: %d/%d (%.0f%%) | Скорость: %.0f/мин",
+                                     completed, len(usernames), percent, speed)
                         
                 except Exception as e:
-                    error_result = {
-                        'username': username,
-                        'status': f'Future Error: {type(e).__name__}',
-                        'reason': f'Ошибка выполнения: {str(e)}',
-                        'available': False,
-                        'url': f"{self.base_url}/username/{username}",
-                        'response_time': 0,
-                        'success': False
-                    }
-                    results.append(error_result)
-                    print(f"   ⚠️ {username} - Ошибка выполнения: {type(e).__name__}")
+                    results.append(CheckResult(username, f'Future Error: {type(e).__name__}', False, False,
+                                               base_url=self.base_url, detail=f'Ошибка выполнения: {str(e)}'))
+                    logger.warning("   ⚠️ %s - Ошибка выполнения: %s", username, type(e).__name__)
                     completed += 1
         
         total_time = time.time() - start_time
         usernames_per_minute = len(usernames) / (total_time / 60)
         
-        print("─" * 60)
-        print(f"⏱️  Проверено {len(usernames)} юзернеймов за {total_time:.1f} сек")
-        print(f"🚀 Скорость: {usernames_per_minute:.0f} юзернеймов/мин")
+        batch = ResultBatch(results)
+        p95, = batch.latency_quantiles((0.95,))
+        logger.info("⏱️  Проверено %d юзернеймов за %.1f сек", len(usernames), total_time)
+        logger.info("🚀 Скорость: %.0f юзернеймов/мин | Свободных: %d | p95: %.2fs",
+                    usernames_per_minute, batch.available_count, p95)
+        
+        return results
+
+    def _parse_listing_page(self, html: str, request_time: float) -> List[CheckResult]:
+        """Разбирает строки таблицы поисковой выдачи в результаты проверки"""
+        from bs4 import BeautifulSoup
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        results = []
+        
+        for row in soup.select('tr.tm-row-selectable'):
+            value = row.select_one('.tm-value')
+            status_tag = row.select_one('[class*="tm-status-"]')
+            if value is None or status_tag is None:
+                continue
+            
+            username = value.get_text(strip=True).lstrip('@').lower()
+            if not username:
+                continue
+            
+            listing_status = status_tag.get_text(strip=True)
+            available = listing_status == 'Unavailable'
+            results.append(CheckResult(username, 'Available' if available else 'Taken', available, True,
+                                       request_time, base_url=self.base_url,
+                                       detail=sys.intern(f'Поиск Fragment: {listing_status}')))
+        
+        return results
+
+    def search_usernames(self, query: str, max_pages: int = 10) -> List[CheckResult]:
+        """Статусы всех юзернеймов из поисковой выдачи Fragment по запросу/префиксу"""
+        results: Dict[str, CheckResult] = {}
+        
+        for page in range(max_pages):
+            params = {'query': query, 'offset': len(results)} if page else {'query': query}
+            try:
+                start_time = time.time()
+                response = self.session.get(self.base_url + '/', params=params, timeout=15)
+                request_time = time.time() - start_time
+            except requests.exceptions.RequestException as e:
+                logger.warning("   ⚠️ Поиск '%s' - Ошибка: %s", query, type(e).__name__)
+                break
+            
+            if response.status_code != 200:
+                logger.warning("   ⚠️ Поиск '%s' - Ошибка HTTP %s", query, response.status_code)
+                break
+            
+            new_rows = 0
+            for result in self._parse_listing_page(response.text, request_time):
+                if result['username'] not in results:
+                    results[result['username']] = result
+                    new_rows += 1
+            
+            # Пустая страница или одни повторы - выдача закончилась
+            if not new_rows:
+                break
+        
+        logger.info("🔎 Поиск '%s': %d юзернеймов из выдачи", query, len(results))
+        return list(results.values())
+
+    def check_usernames_bulk(self, usernames: List[str], query: str, max_pages: int = 10,
+                             max_workers: int = 15) -> List[CheckResult]:
+        """Проверка через поисковую выдачу; имена, которых в ней нет, проверяются по одному"""
+        listing = {r['username']: r for r in self.search_usernames(query, max_pages)}
+        
+        results = [listing[username.lower()] for username in usernames if username.lower() in listing]
+        missing = [username for username in usernames if username.lower() not in listing]
+        
+        logger.info("📑 Из выдачи: %d, отдельной проверкой: %d", len(results), len(missing))
+        if missing:
+            results.extend(self.check_usernames_batch(missing, max_workers=max_workers))
         
-        return results
\ No newline at end of file
+        return results
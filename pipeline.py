@@ -0,0 +1,294 @@
+import heapq
+import itertools
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from generator import UsernameGenerator
+from metrics import METRICS
+from parser import FragmentParser
+from ratelimit import TokenBucket
+from results import CANCELLED, is_transient
+from scoring import ValueScorer
+from storage import ResultStore
+
+
+class RetryQueue:
+    """Отложенные повторы неудачных проверок: куча по времени следующей попытки.
+
+    Задержка растет экспоненциально с номером попытки, со случайным разбросом
+    (full jitter), чтобы пачка ошибок не превращалась в синхронный шторм повторов.
+    После max_attempts имя больше не планируется.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.heap: List[Tuple[float, int, str]] = []
+        self.attempts: Dict[str, int] = {}
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def schedule(self, username: str, retry_after: Optional[float] = None) -> bool:
+        """Планирует повтор. False если попытки исчерпаны"""
+        with self.lock:
+            attempt = self.attempts.get(username, 0) + 1
+            if attempt > self.max_attempts:
+                del self.attempts[username]
+                return False
+            self.attempts[username] = attempt
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+            if retry_after:
+                delay = max(delay, retry_after)
+            heapq.heappush(self.heap, (time.monotonic() + delay, next(self.counter), username))
+            return True
+
+    def pop_due(self) -> Optional[str]:
+        """Имя, время повтора которого наступило, или None"""
+        with self.lock:
+            if self.heap and self.heap[0][0] <= time.monotonic():
+                return heapq.heappop(self.heap)[2]
+            return None
+
+    def attempt_of(self, username: str) -> int:
+        with self.lock:
+            return self.attempts.get(username, 0)
+
+    def done(self, username: str):
+        """Имя проверено окончательно - забываем счетчик попыток"""
+        with self.lock:
+            self.attempts.pop(username, None)
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class CheckPipeline:
+    """Непрерывный конвейер: генератор -> очередь -> воркеры -> обработчик результатов.
+
+    Очередь кандидатов ограничена, поэтому генератор ждет, пока воркеры
+    не освободят место (backpressure). Темп запросов задается rate (проверок/сек),
+    0 или None - без ограничения. Если передан store, недавно проверенные имена
+    пропускаются, а все результаты сохраняются в него. Временные ошибки
+    (таймауты, 429, 5xx) уходят в RetryQueue и перемежаются со свежими именами.
+    Со scorer очередь кандидатов становится приоритетной: из queue_size
+    ожидающих имен первым проверяется самое ценное.
+    """
+
+    def __init__(self, generator: UsernameGenerator, parser: FragmentParser,
+                 category: str = "4char", workers: int = 15, rate: Optional[float] = None,
+                 queue_size: int = 200, chunk_size: int = 20,
+                 store: Optional[ResultStore] = None,
+                 retries: Optional[RetryQueue] = None,
+                 scorer: Optional[ValueScorer] = None,
+                 on_result: Optional[Callable[[Dict], None]] = None):
+        self.generator = generator
+        self.parser = parser
+        self.category = category
+        # При адаптивном регулировании число одновременных запросов задает регулятор
+        self.workers = max(workers, parser.limiter.max_limit) if parser.limiter else workers
+        parser.ensure_pool_size(self.workers)
+        self.chunk_size = chunk_size
+        self.store = store
+        self.retries = retries if retries is not None else RetryQueue()
+        self.on_result = on_result
+
+        self.rate_limiter = TokenBucket(rate)
+        # Элементы очереди - (-оценка, порядковый номер, имя); без scorer оценка 0
+        self.scorer = scorer
+        self.sequence = itertools.count()
+        queue_class = queue.PriorityQueue if scorer else queue.Queue
+        self.candidates: queue.Queue = queue_class(maxsize=queue_size)
+        self.results: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+        # Имен в работе: от постановки в очередь до учета результата, включая ожидание повтора
+        self.busy = 0
+        self.busy_lock = threading.Lock()
+
+        self.total_checked = 0
+        self.total_found = 0
+        self.total_errors = 0
+        self.total_skipped = 0
+        self.total_retries = 0
+
+    def start(self):
+        """Запускает все стадии конвейера"""
+        self.stop_event.clear()
+        self.threads = [threading.Thread(target=self._produce, name="pipeline-producer", daemon=True)]
+        self.threads += [
+            threading.Thread(target=self._work, name=f"pipeline-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self.threads.append(threading.Thread(target=self._sink, name="pipeline-sink", daemon=True))
+        for thread in self.threads:
+            thread.start()
+        self._register_gauges()
+
+    def stop(self):
+        """Останавливает конвейер (не дожидаясь завершения потоков)"""
+        self.stop_event.set()
+        for name, labels, _ in self._gauges():
+            METRICS.unregister_gauge(name, labels)
+
+    def _gauges(self):
+        gauges = [
+            ('pipeline_queue_depth', {'queue': 'candidates'}, self.candidates.qsize),
+            ('pipeline_queue_depth', {'queue': 'results'}, self.results.qsize),
+            ('pipeline_retry_pending', None, lambda: len(self.retries)),
+        ]
+        gauges.append(('http_connections_opened', None, lambda: self.parser.pool_stats()['connections']))
+        gauges.append(('http_requests_sent', None, lambda: self.parser.pool_stats()['requests']))
+        limiter = self.parser.limiter
+        if limiter is not None:
+            gauges.append(('limiter_concurrency_limit', None, lambda: limiter.current_limit))
+            gauges.append(('limiter_observed_rate', None, limiter.observed_rate))
+        return gauges
+
+    def _register_gauges(self):
+        """Глубина очередей и состояние регулятора - в общий реестр метрик"""
+        for name, labels, callback in self._gauges():
+            METRICS.register_gauge(name, callback, labels)
+
+    def join(self, timeout: Optional[float] = None):
+        """Ждет потоки не дольше timeout секунд на все вместе"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self.threads:
+            thread.join(max(0.0, deadline - time.monotonic()) if deadline is not None else None)
+
+    @property
+    def running(self) -> bool:
+        return not self.stop_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        """Генератор исчерпан и вся работа (включая повторы) доделана"""
+        # busy не обнуляется, пока имя лежит в любой из очередей или у воркера
+        with self.busy_lock:
+            return bool(self.threads) and not self.threads[0].is_alive() and not self.busy
+
+    def set_rate(self, rate: Optional[float]):
+        """Меняет целевой темп проверок на лету"""
+        self.rate_limiter.set_rate(rate)
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Кладет в очередь, ожидая свободное место, пока конвейер не остановлен"""
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self.stop_event.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    def _produce(self):
+        """Стадия генерации: непрерывно подает кандидатов в очередь"""
+        while not self.stop_event.is_set():
+            if self.generator.sweep_finished(self.category):
+                # Пространство пройдено полностью - новых кандидатов не будет
+                return
+
+            usernames = self.generator.generate_batch(self.chunk_size, self.category)
+            if not usernames:
+                # Генератор исчерпан - начинаем историю заново
+                self.generator.clear_used_usernames()
+                self.stop_event.wait(0.5)
+                continue
+
+            if self.store:
+                fresh = self.store.filter_unchecked(usernames)
+                self.total_skipped += len(usernames) - len(fresh)
+                if len(fresh) < len(usernames):
+                    fresh_set = set(fresh)
+                    self.generator.mark_checked(name for name in usernames if name not in fresh_set)
+                usernames = fresh
+
+            scores = self.scorer.score_batch(usernames) if self.scorer else [0.0] * len(usernames)
+            for score, username in zip(scores, usernames):
+                self._set_busy(+1)
+                if not self._put(self.candidates, (-score, next(self.sequence), username)):
+                    self._set_busy(-1)
+                    return
+
+    def _set_busy(self, delta: int):
+        with self.busy_lock:
+            self.busy += delta
+
+    def _next_username(self, prefer_retry: bool) -> Optional[str]:
+        """Следующее имя: созревший повтор или свежий кандидат"""
+        if prefer_retry:
+            username = self.retries.pop_due()
+            if username is not None:
+                return username
+        try:
+            return self.candidates.get(timeout=0.2)[2]
+        except queue.Empty:
+            # Свежих нет - не простаиваем, если есть созревшие повторы
+            return self.retries.pop_due()
+
+    def _work(self):
+        """Стадия проверки: берет кандидата, как только воркер свободен"""
+        prefer_retry = False
+        while not self.stop_event.is_set():
+            # Чередуем повторы и свежие имена, чтобы одни не блокировали другие
+            prefer_retry = not prefer_retry
+            username = self._next_username(prefer_retry)
+            if username is None:
+                continue
+            # Имя уже учтено в busy производителем (или повтором) - до обработки результата
+            if not self.rate_limiter.acquire(self.stop_event):
+                return
+            result = self.parser.check_username_status(username, self.stop_event)
+            if result['status'] == CANCELLED or not self._put(self.results, result):
+                return
+
+    def _sink(self):
+        """Стадия обработки результатов: счетчики, хранилище и пользовательский обработчик"""
+        try:
+            while not self.stop_event.is_set():
+                result = self._get(self.results)
+                if result is None:
+                    return
+                retried = False
+                try:
+                    retried = self._handle(result)
+                finally:
+                    # Отложенный повтор остается в работе
+                    if not retried:
+                        self._set_busy(-1)
+        finally:
+            if self.store:
+                self.store.flush()
+
+    def _handle(self, result: Dict) -> bool:
+        """Учет одного результата. True - имя отложено на повтор"""
+        if not result['success'] and is_transient(result):
+            if self.retries.schedule(result['username'], result.get('retry_after')):
+                self.total_retries += 1
+                return True
+        else:
+            self.retries.done(result['username'])
+        # Позиция перебора сохраняется только за окончательно учтенными именами
+        self.generator.mark_checked((result['username'],))
+
+        self.total_checked += 1
+        if result['available']:
+            self.total_found += 1
+        if not result['success']:
+            self.total_errors += 1
+        if self.store:
+            self.store.record(result)
+        if self.on_result:
+            self.on_result(result)
+        return False
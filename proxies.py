@@ -0,0 +1,172 @@
+"""Пул исходящих прокси с собственным бюджетом запросов у каждого.
+
+У каждого прокси своя сессия requests (свой пул соединений), свой
+TokenBucket и оценка здоровья. Проверка уходит через прокси с наибольшим
+доступным бюджетом; после 429 или сетевых ошибок прокси уходит на паузу
+(по Retry-After или с экспоненциальным ростом). SOCKS-прокси требуют
+необязательный пакет PySocks (pip install requests[socks]).
+
+Для локальной проверки подходят экземпляры MockFragmentServer: сервер
+понимает абсолютные URL в строке запроса, поэтому годится как HTTP-прокси
+для http-адресов, а его троттлинг имитирует лимит на один IP.
+"""
+import threading
+import time
+import urllib.parse
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from connections import ConnectionCounter, CountingAdapter
+from ratelimit import TokenBucket
+from results import CheckResult
+
+
+class Proxy:
+    """Один исходящий прокси: сессия, бюджет, здоровье и пауза"""
+
+    def __init__(self, url: str, rate: float = 0):
+        self.url = url
+        self.name = urllib.parse.urlsplit(url).netloc.rsplit('@', 1)[-1] or url
+        self.session = requests.Session()
+        # Иначе HTTP(S)_PROXY из окружения перекрывает session.proxies и запросы идут мимо пула
+        self.session.trust_env = False
+        self.session.proxies = {'http': url, 'https': url}
+        self.bucket = TokenBucket(rate)
+
+        # 1.0 - здоров; падает при ошибках и медленно восстанавливается
+        self.health = 1.0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def score(self, now: float) -> float:
+        """Доступный бюджет с учетом здоровья; < 0 - прокси на паузе"""
+        if now < self.cooldown_until:
+            return -1.0
+        available = self.bucket.available()
+        if available == float('inf'):
+            # Без лимита выбираем наименее загруженный
+            available = 1000.0 / (1 + self.in_flight)
+        return available * self.health
+
+    def stats(self) -> Dict:
+        return {
+            'proxy': self.name,
+            'requests': self.requests,
+            'errors': self.errors,
+            'throttled': self.throttled,
+            'health': round(self.health, 2),
+            'cooling': max(0.0, round(self.cooldown_until - time.monotonic(), 1)),
+        }
+
+
+class ProxyPool:
+    """Планировщик: каждую проверку - через прокси с наибольшим бюджетом"""
+
+    def __init__(self, urls: Iterable[str], rate: float = 0,
+                 cooldown: float = 30.0, max_cooldown: float = 600.0):
+        urls = [url.strip() for url in urls if url.strip()]
+        if not urls:
+            raise ValueError("Пустой список прокси")
+        if any(url.lower().startswith('socks') for url in urls):
+            try:
+                import socks  # noqa: F401
+            except ImportError:
+                raise ImportError("Для SOCKS-прокси нужен PySocks: pip install requests[socks]") from None
+
+        self.proxies: List[Proxy] = [Proxy(url, rate) for url in urls]
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.lock = threading.Lock()
+        # Сокеты, открытые всеми прокси (включая переподключения)
+        self.connections = ConnectionCounter()
+
+    @classmethod
+    def from_file(cls, filename: str, **kwargs) -> 'ProxyPool':
+        """Прокси из файла: по одному URL на строку, # - комментарий"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            urls = [line.split('#', 1)[0] for line in f]
+        return cls(urls, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    @property
+    def sessions(self) -> List[requests.Session]:
+        return [proxy.session for proxy in self.proxies]
+
+    def ensure_pool_size(self, concurrency: int):
+        """Пул соединений каждого прокси - на весь параллелизм (все может уйти в один)"""
+        for proxy in self.proxies:
+            adapter = CountingAdapter(self.connections, pool_connections=4, pool_maxsize=concurrency)
+            proxy.session.mount('https://', adapter)
+            proxy.session.mount('http://', adapter)
+
+    def set_rate(self, rate: float):
+        for proxy in self.proxies:
+            proxy.bucket.set_rate(rate)
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> Optional[Proxy]:
+        """Выбирает прокси и списывает с него токен. None - если выставлен stop_event"""
+        while True:
+            now = time.monotonic()
+            with self.lock:
+                ranked = sorted(self.proxies, key=lambda p: p.score(now), reverse=True)
+                for proxy in ranked:
+                    if proxy.score(now) < 0:
+                        break
+                    if proxy.bucket.try_acquire() <= 0:
+                        proxy.in_flight += 1
+                        proxy.requests += 1
+                        return proxy
+                # Бюджета нет ни у кого: ждем ближайший токен или конец паузы
+                waits = []
+                for proxy in self.proxies:
+                    if now < proxy.cooldown_until:
+                        waits.append(proxy.cooldown_until - now)
+                    elif not proxy.bucket.unlimited:
+                        waits.append((1.0 - proxy.bucket.available()) / proxy.bucket.rate)
+                wait = min(0.5, max(0.001, min(waits, default=0.01)))
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return None
+            else:
+                time.sleep(wait)
+
+    def release(self, proxy: Proxy, result: Optional[CheckResult]):
+        """Учитывает исход запроса через прокси (None - запрос без исхода, например прогрев)"""
+        with self.lock:
+            proxy.in_flight -= 1
+            if result is None:
+                return
+            if result.code == 429:
+                proxy.throttled += 1
+                proxy.failures += 1
+                pause = result.get('retry_after') or self._backoff(proxy.failures)
+                proxy.cooldown_until = max(proxy.cooldown_until, time.monotonic() + pause)
+            elif not result.success:
+                # Любая неудача через прокси (включая 403/407 от него самого) - минус здоровью
+                proxy.errors += 1
+                proxy.failures += 1
+                proxy.health = max(0.05, proxy.health * 0.5)
+                if proxy.failures >= 3:
+                    proxy.cooldown_until = time.monotonic() + self._backoff(proxy.failures - 2)
+            else:
+                proxy.failures = 0
+                proxy.health = min(1.0, proxy.health + 0.1)
+
+    def _backoff(self, failures: int) -> float:
+        return min(self.max_cooldown, self.cooldown * 2 ** (failures - 1))
+
+    def stats(self) -> List[Dict]:
+        with self.lock:
+            return [proxy.stats() for proxy in self.proxies]
+
+    def close(self):
+        for proxy in self.proxies:
+            proxy.session.close()
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, Optional
+
+from results import CheckResult, is_transient
+
+
+class TokenBucket:
+    """Токен-бакет: средний темп rate событий/сек с запасом burst"""
+
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None):
+        self.rate = rate or 0.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self) -> float:
+        """Сколько токенов доступно прямо сейчас"""
+        if self.unlimited:
+            return float('inf')
+        with self.lock:
+            self._refill(time.monotonic())
+            return self.tokens
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Пытается взять токены. Возвращает 0 при успехе, иначе сколько секунд подождать"""
+        if self.unlimited:
+            return 0.0
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            return (tokens - self.tokens) / self.rate
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """Блокирует до получения токена. False если выставлен stop_event"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return True
+            if stop_event is not None:
+                if stop_event.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+    def set_rate(self, rate: Optional[float]):
+        """Меняет темп на лету"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate or 0.0
+            self.capacity = max(1.0, self.rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After (секунды или HTTP-дата) в секунды"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class AdaptiveLimiter:
+    """AIMD-регулятор числа одновременных запросов (как окно перегрузки в TCP).
+
+    Пока запросы успешны и задержка не выше latency_tolerance * базовая,
+    лимит растет примерно на increase за "окно" ответов. На 429/5xx,
+    таймауты и обрывы соединения лимит умножается на decrease (не чаще
+    раза за среднее время ответа), а Retry-After приостанавливает выдачу слотов.
+    """
+
+    def __init__(self, initial: int = 15, min_limit: int = 1, max_limit: int = 100,
+                 increase: float = 1.0, decrease: float = 0.5,
+                 latency_tolerance: float = 2.0, rate_window: float = 10.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.rate_window = rate_window
+
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.base_latency: Optional[float] = None
+        self.avg_latency: Optional[float] = None
+        self.completions: Deque[float] = deque()
+        self.cond = threading.Condition()
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self, stop_event: Optional[threading.Event] = None) -> bool:
+        """Ждет свободный слот. False если выставлен stop_event"""
+        with self.cond:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return False
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    self.cond.wait(min(self.blocked_until - now, 0.5))
+                elif self.in_flight < self.current_limit:
+                    self.in_flight += 1
+                    return True
+                else:
+                    self.cond.wait(0.5)
+
+    def release(self, result: Optional[CheckResult]):
+        """Освобождает слот и корректирует лимит по результату запроса"""
+        with self.cond:
+            now = time.monotonic()
+            self.in_flight -= 1
+            self.completions.append(now)
+            while self.completions and self.completions[0] < now - self.rate_window:
+                self.completions.popleft()
+
+            if result is not None:
+                if is_transient(result):
+                    self._on_congestion(now, result.get('retry_after'))
+                elif result['success']:
+                    self._on_success(result.elapsed)
+
+            self.cond.notify_all()
+
+    def _on_success(self, latency: float):
+        if self.base_latency is None or latency < self.base_latency:
+            self.base_latency = latency
+        else:
+            # Базовая задержка медленно "всплывает", если сеть стала медленнее
+            self.base_latency += (latency - self.base_latency) * 0.001
+        self.avg_latency = latency if self.avg_latency is None else self.avg_latency * 0.9 + latency * 0.1
+
+        if latency <= max(self.base_latency, 0.05) * self.latency_tolerance:
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+
+    def _on_congestion(self, now: float, retry_after: Optional[float]):
+        # Одна реакция на одно "окно" - пачка ошибок не обрушит лимит до минимума
+        if now - self.last_decrease >= (self.avg_latency or 1.0):
+            self.limit = max(self.min_limit, self.limit * self.decrease)
+            self.last_decrease = now
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+
+    def observed_rate(self) -> float:
+        """Завершенных запросов в секунду за последнее окно"""
+        with self.cond:
+            now = time.monotonic()
+            while self.completions and self.completions[0] < now - self.rate_window:
+                self.completions.popleft()
+            return len(self.completions) / self.rate_window
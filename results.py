@@ -0,0 +1,185 @@
+"""Компактные результаты проверок.
+
+CheckResult - запись на __slots__ вместо словаря из 7 ключей: статус
+хранится интернированной строкой, задержка - числом без округления
+(response_time для вывода округляется при обращении), а ссылка и
+текстовая причина вычисляются только при обращении. Для совместимости
+запись поддерживает result['status'], result.get(...) и to_dict().
+
+ResultBatch хранит много результатов по колонкам (array) и быстро
+считает сводки: исходы, найденные, квантили задержки.
+"""
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+# Ключи словаря прежнего формата (retry_after - только если задан)
+KEYS = ('username', 'status', 'reason', 'available', 'url', 'response_time', 'success')
+
+# Проверка не выполнялась: конвейер остановлен, пока она ждала слот или бюджет
+CANCELLED = 'Cancelled'
+
+REASONS = {
+    'Available': 'Свободен (Unavailable)',
+    'Taken': 'Занят (не Unavailable)',
+    'Timeout': 'Таймаут запроса',
+    'ConnectionError': 'Ошибка подключения',
+    CANCELLED: 'Проверка отменена',
+}
+
+_http_statuses: Dict[int, str] = {}
+
+
+def http_status(code: int) -> str:
+    """Строка статуса 'HTTP <код>' - одна на весь процесс для каждого кода"""
+    status = _http_statuses.get(code)
+    if status is None:
+        status = _http_statuses[code] = sys.intern(f'HTTP {code}')
+    return status
+
+
+class CheckResult:
+    """Результат проверки одного юзернейма"""
+
+    __slots__ = ('username', 'status', 'available', 'success', 'elapsed',
+                 'code', 'retry_after', 'base_url', 'detail')
+
+    def __init__(self, username: str, status: str, available: bool, success: bool,
+                 elapsed: float = 0.0, code: int = 0, retry_after: Optional[float] = None,
+                 base_url: str = "https://fragment.com", detail: Optional[str] = None):
+        self.username = username
+        self.status = sys.intern(status)
+        self.available = available
+        self.success = success
+        # Сколько секунд занял запрос при любом исходе (для таймаута - до срабатывания)
+        self.elapsed = elapsed
+        # Код HTTP-ответа (0 - ответа не было)
+        self.code = code
+        self.retry_after = retry_after
+        self.base_url = base_url
+        # Нестандартная причина (текст исключения, статус из поисковой выдачи)
+        self.detail = detail
+
+    @property
+    def response_time(self) -> float:
+        return round(self.elapsed, 2)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/username/{self.username}"
+
+    @property
+    def reason(self) -> str:
+        if self.detail is not None:
+            return self.detail
+        if self.status == 'Available' and self.code == 404:
+            return 'Страница не найдена (404)'
+        reason = REASONS.get(self.status)
+        if reason is None:
+            reason = f'Ошибка HTTP: {self.code}' if self.code else self.status
+        return reason
+
+    # Совместимость со словарями прежнего формата
+
+    def __getitem__(self, key: str):
+        if key == 'retry_after':
+            if self.retry_after is None:
+                raise KeyError(key)
+            return self.retry_after
+        if key not in KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key in KEYS or (key == 'retry_after' and self.retry_after is not None)
+
+    def keys(self) -> List[str]:
+        return list(KEYS) + (['retry_after'] if self.retry_after is not None else [])
+
+    def to_dict(self) -> Dict:
+        result = {key: getattr(self, key) for key in KEYS}
+        if self.retry_after is not None:
+            result['retry_after'] = self.retry_after
+        return result
+
+    def __repr__(self) -> str:
+        return f"CheckResult({self.username!r}, {self.status!r}, {self.response_time}s)"
+
+
+def is_transient(result: CheckResult) -> bool:
+    """Временная ошибка, которую стоит повторить и считать перегрузкой:
+    таймаут, обрыв соединения, 429 или 5xx"""
+    if result.code:
+        return result.code == 429 or result.code >= 500
+    return result.status in ('Timeout', 'ConnectionError')
+
+
+def as_dict(result) -> Dict:
+    """Словарь для JSON из CheckResult или уже готового словаря"""
+    return result.to_dict() if isinstance(result, CheckResult) else result
+
+
+class ResultBatch:
+    """Колоночное хранение результатов для сводок по большим батчам"""
+
+    AVAILABLE = 1
+    SUCCESS = 2
+
+    def __init__(self, results: Iterable = ()):
+        self.usernames: List[str] = []
+        self.statuses: List[str] = []
+        # Коды статусов - индексы в self.statuses
+        self.codes = array('H')
+        self.flags = array('B')
+        self.latencies = array('d')
+        self._status_index: Dict[str, int] = {}
+        self.extend(results)
+
+    def append(self, result):
+        status = result['status']
+        index = self._status_index.get(status)
+        if index is None:
+            index = self._status_index[status] = len(self.statuses)
+            self.statuses.append(status)
+        self.usernames.append(result['username'])
+        self.codes.append(index)
+        self.flags.append((self.AVAILABLE if result['available'] else 0)
+                          | (self.SUCCESS if result['success'] else 0))
+        self.latencies.append(result.elapsed if isinstance(result, CheckResult)
+                              else result.get('response_time', 0.0))
+
+    def extend(self, results: Iterable):
+        for result in results:
+            self.append(result)
+
+    def __len__(self) -> int:
+        return len(self.usernames)
+
+    def status_counts(self) -> Dict[str, int]:
+        return {self.statuses[code]: count for code, count in Counter(self.codes).items()}
+
+    @property
+    def available_count(self) -> int:
+        return sum(flag & self.AVAILABLE for flag in self.flags)
+
+    @property
+    def success_count(self) -> int:
+        return sum(1 for flag in self.flags if flag & self.SUCCESS)
+
+    def available_usernames(self) -> List[str]:
+        return [name for name, flag in zip(self.usernames, self.flags) if flag & self.AVAILABLE]
+
+    def latency_quantiles(self, fractions: Iterable[float] = (0.5, 0.95, 0.99)) -> List[float]:
+        """Квантили задержки по успешным проверкам"""
+        ordered = sorted(latency for latency, flag in zip(self.latencies, self.flags) if flag & self.SUCCESS)
+        if not ordered:
+            return [0.0 for _ in fractions]
+        last = len(ordered) - 1
+        return [ordered[min(last, max(0, int(round(f * last))))] for f in fractions]
@@ -0,0 +1,217 @@
+import bisect
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Iterable, List, Optional
+
+ALL_STATUSES = "Все"
+
+
+class ResultsTable:
+    """Таблица результатов с постраничным показом.
+
+    Все строки хранятся в памяти как список словарей, а в Treeview
+    материализуется только текущая страница (page_size строк). Новые
+    результаты встраиваются в отсортированный индекс через bisect, поэтому
+    добавление, сортировка и фильтрация не перестраивают всю таблицу.
+    Хранится не больше max_rows последних строк: старые отбрасываются
+    пачками, полный список результатов остается в файле.
+    """
+
+    COLUMNS = ('username', 'status', 'response_time', 'url')
+    HEADINGS = {
+        'username': 'Юзернейм',
+        'status': 'Статус',
+        'response_time': 'Время ответа',
+        'url': 'Ссылка',
+    }
+    WIDTHS = {'username': 120, 'status': 100, 'response_time': 80, 'url': 200}
+
+    def __init__(self, parent: tk.Widget, page_size: int = 200, max_rows: int = 10000):
+        self.page_size = page_size
+        self.max_rows = max_rows
+        # Обрезаем с запасом, чтобы индекс не перестраивался на каждую строку
+        self.trim_step = max(1, max_rows // 10)
+        self.rows: List[Dict] = []
+
+        # Текущий вид: индексы строк по возрастанию ключа сортировки и сами ключи.
+        # Обратный порядок - это тот же индекс, читаемый с конца
+        self.view: List[int] = []
+        self.view_keys: List[tuple] = []
+        self.sort_column: Optional[str] = None
+        self.sort_reverse = False
+        self.status_filter = ALL_STATUSES
+        self.max_response_time: Optional[float] = None
+        self.page = 0
+        self.statuses = set()
+
+        self._build(parent)
+
+    def _build(self, parent: tk.Widget):
+        filter_frame = ttk.Frame(parent)
+        filter_frame.pack(fill='x', pady=5)
+
+        ttk.Label(filter_frame, text="Статус:").pack(side='left')
+        self.status_var = tk.StringVar(value=ALL_STATUSES)
+        self.status_box = ttk.Combobox(filter_frame, textvariable=self.status_var, width=15,
+                                       values=[ALL_STATUSES], state='readonly')
+        self.status_box.pack(side='left', padx=5)
+        self.status_box.bind('<<ComboboxSelected>>', lambda _: self.apply_filters())
+
+        ttk.Label(filter_frame, text="Время ответа до, с:").pack(side='left', padx=(10, 0))
+        self.time_var = tk.StringVar(value="")
+        time_entry = ttk.Entry(filter_frame, textvariable=self.time_var, width=8)
+        time_entry.pack(side='left', padx=5)
+        time_entry.bind('<Return>', lambda _: self.apply_filters())
+        ttk.Button(filter_frame, text="Применить", command=self.apply_filters).pack(side='left', padx=5)
+
+        self.next_button = ttk.Button(filter_frame, text="▶", width=3, command=lambda: self.go_to_page(self.page + 1))
+        self.next_button.pack(side='right')
+        self.page_label = ttk.Label(filter_frame, text="")
+        self.page_label.pack(side='right', padx=5)
+        self.prev_button = ttk.Button(filter_frame, text="◀", width=3, command=lambda: self.go_to_page(self.page - 1))
+        self.prev_button.pack(side='right')
+
+        table_frame = ttk.Frame(parent)
+        table_frame.pack(fill='both', expand=True)
+
+        self.tree = ttk.Treeview(table_frame, columns=self.COLUMNS, show='headings', height=15)
+        for column in self.COLUMNS:
+            self.tree.heading(column, text=self.HEADINGS[column],
+                              command=lambda c=column: self.sort_by(c))
+            self.tree.column(column, width=self.WIDTHS[column])
+
+        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+
+        self.tree.pack(side='left', fill='both', expand=True)
+        scrollbar.pack(side='right', fill='y')
+
+        self._update_pager()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def page_count(self) -> int:
+        return max(1, (len(self.view) + self.page_size - 1) // self.page_size)
+
+    def _key(self, index: int) -> tuple:
+        if self.sort_column is None:
+            return (index,)
+        return (self.rows[index][self.sort_column], index)
+
+    def _matches(self, row: Dict) -> bool:
+        if self.status_filter != ALL_STATUSES and row['status'] != self.status_filter:
+            return False
+        if self.max_response_time is not None and row.get('response_time', 0) > self.max_response_time:
+            return False
+        return True
+
+    def append(self, results: Iterable[Dict]):
+        """Добавляет новые строки; перерисовывает страницу, только если они на нее попали"""
+        page_start = self.page * self.page_size
+        page_end = page_start + self.page_size
+        touches_page = False
+
+        for row in results:
+            index = len(self.rows)
+            self.rows.append(row)
+            self._add_status(row['status'])
+            if not self._matches(row):
+                continue
+
+            key = self._key(index)
+            position = bisect.bisect_right(self.view_keys, key)
+            self.view.insert(position, index)
+            self.view_keys.insert(position, key)
+            if self.sort_reverse:
+                position = len(self.view) - 1 - position
+            if position < page_end:
+                touches_page = True
+
+        if len(self.rows) > self.max_rows + self.trim_step:
+            self._trim()
+        elif touches_page:
+            self._render_page()
+        else:
+            self._update_pager()
+
+    def _trim(self):
+        """Отбрасывает самые старые строки сверх max_rows"""
+        del self.rows[:len(self.rows) - self.max_rows]
+        self._rebuild_view()
+
+    def clear(self):
+        self.rows = []
+        self.view = []
+        self.view_keys = []
+        self.page = 0
+        self.statuses = set()
+        self.status_box.config(values=[ALL_STATUSES])
+        self._render_page()
+
+    def sort_by(self, column: str):
+        """Сортировка по колонке; повторный клик меняет направление"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        self._rebuild_view()
+
+    def apply_filters(self):
+        self.status_filter = self.status_var.get() or ALL_STATUSES
+        try:
+            self.max_response_time = float(self.time_var.get()) if self.time_var.get().strip() else None
+        except ValueError:
+            self.max_response_time = None
+        self.page = 0
+        self._rebuild_view()
+
+    def go_to_page(self, page: int):
+        page = max(0, min(page, self.page_count - 1))
+        if page != self.page:
+            self.page = page
+            self._render_page()
+
+    def _add_status(self, status: str):
+        if status not in self.statuses:
+            self.statuses.add(status)
+            self.status_box.config(values=[ALL_STATUSES] + sorted(self.statuses))
+
+    def _rebuild_view(self):
+        """Пересчитывает индекс показа (без обращений к Tk) и рисует одну страницу"""
+        indices = [i for i, row in enumerate(self.rows) if self._matches(row)]
+        keyed = sorted((self._key(i), i) for i in indices)
+        self.view = [i for _, i in keyed]
+        self.view_keys = [key for key, _ in keyed]
+        self.page = min(self.page, self.page_count - 1)
+        self._render_page()
+
+    def _render_page(self):
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+
+        for index in self._page_indices():
+            row = self.rows[index]
+            self.tree.insert('', 'end', values=(
+                row['username'],
+                row['status'],
+                f"{row['response_time']}с",
+                row['url']
+            ))
+        self._update_pager()
+
+    def _page_indices(self) -> List[int]:
+        """Индексы строк текущей страницы в порядке показа"""
+        start = self.page * self.page_size
+        if not self.sort_reverse:
+            return self.view[start:start + self.page_size]
+        end = len(self.view) - start
+        return self.view[max(0, end - self.page_size):end][::-1]
+
+    def _update_pager(self):
+        self.page_label.config(text=f"Стр. {self.page + 1} из {self.page_count} ({len(self.view)} строк)")
+        self.prev_button.config(state='normal' if self.page > 0 else 'disabled')
+        self.next_button.config(state='normal' if self.page < self.page_count - 1 else 'disabled')
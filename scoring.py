@@ -0,0 +1,109 @@
+"""Оценка "ценности" юзернейма для порядка проверки.
+
+Признаки: словарное слово, произносимость (чередование гласных и
+согласных), повторы букв и клавиатурные последовательности. Все, что
+зависит от пар соседних символов, заранее сведено в одну таблицу
+пара -> вес, поэтому оценка имени - это несколько обращений к словарю
+без регулярных выражений и циклов по признакам.
+"""
+import string
+from typing import Dict, Iterable, List, Optional
+
+VOWELS = set('aeiouy')
+CONSONANTS = set(string.ascii_lowercase) - VOWELS
+
+KEYBOARD_ROWS = ('qwertyuiop', 'asdfghjkl', 'zxcvbnm', '1234567890')
+
+# Частые пары английских букв - признак "похожести на слово"
+COMMON_BIGRAMS = (
+    'th', 'he', 'in', 'er', 'an', 're', 'on', 'at', 'en', 'nd', 'ti', 'es', 'or', 'te', 'of',
+    'ed', 'is', 'it', 'al', 'ar', 'st', 'to', 'nt', 'ng', 'se', 'ha', 'as', 'ou', 'io', 'le',
+    've', 'co', 'me', 'de', 'hi', 'ri', 'ro', 'ic', 'ne', 'ea', 'ra', 'ce', 'li', 'ch', 'll',
+    'be', 'ma', 'si', 'om', 'ur',
+)
+
+DEFAULT_WEIGHTS = {
+    'dictionary': 10.0,     # имя целиком - словарное слово
+    'pronounceable': 1.0,   # согласная-гласная на стыке, частые пары
+    'cluster': -1.0,        # три согласные или три гласные подряд
+    'repeat': 1.5,          # одинаковые соседние буквы (aa, xx)
+    'keyboard': 0.75,       # соседние клавиши в одном ряду (qw, as, 12)
+    'digit': -1.0,          # цифры и подчеркивания
+    'short': 0.5,           # бонус за каждый символ короче 8
+}
+
+
+class ValueScorer:
+    """Табличная оценка имен: чем выше, тем раньше имя стоит проверить"""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, dictionary: Iterable[str] = ()):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            self.weights.update(weights)
+        self.dictionary = {word.lower() for word in dictionary}
+        self.pairs = self._build_pair_table()
+        self.triples = self._build_cluster_table()
+        self.chars = {char: self.weights['digit'] for char in string.digits + '_'}
+
+    def _build_pair_table(self) -> Dict[str, float]:
+        """Вес каждой пары соседних символов: все парные признаки сразу"""
+        w = self.weights
+        adjacent = set()
+        for row in KEYBOARD_ROWS:
+            for a, b in zip(row, row[1:]):
+                adjacent.add(a + b)
+                adjacent.add(b + a)
+        common = set(COMMON_BIGRAMS)
+
+        alphabet = string.ascii_lowercase + string.digits + '_'
+        table = {}
+        for a in alphabet:
+            for b in alphabet:
+                pair = a + b
+                value = 0.0
+                if (a in CONSONANTS and b in VOWELS) or (a in VOWELS and b in CONSONANTS):
+                    value += w['pronounceable']
+                if pair in common:
+                    value += w['pronounceable']
+                if a == b:
+                    value += w['repeat']
+                if pair in adjacent:
+                    value += w['keyboard']
+                if value:
+                    table[pair] = value
+        return table
+
+    def _build_cluster_table(self) -> Dict[str, float]:
+        """Тройки одного класса (xqz, aei) - труднопроизносимые места"""
+        table = {}
+        for group in (CONSONANTS, VOWELS):
+            for a in group:
+                for b in group:
+                    for c in group:
+                        # Тройной повтор (aaa) - это не кластер, а ценный повтор
+                        if not (a == b == c):
+                            table[a + b + c] = self.weights['cluster']
+        return table
+
+    def score(self, name: str) -> float:
+        pairs = self.pairs
+        triples = self.triples
+        chars = self.chars
+        value = self.weights['dictionary'] if name in self.dictionary else 0.0
+        value += self.weights['short'] * max(0, 8 - len(name))
+        for i in range(len(name) - 1):
+            value += pairs.get(name[i:i + 2], 0.0)
+        for i in range(len(name) - 2):
+            value += triples.get(name[i:i + 3], 0.0)
+        for char in name:
+            value += chars.get(char, 0.0)
+        return value
+
+    def score_batch(self, names: Iterable[str]) -> List[float]:
+        score = self.score
+        return [score(name) for name in names]
+
+    def rank(self, names: Iterable[str]) -> List[str]:
+        """Имена по убыванию оценки"""
+        names = list(names)
+        return [name for _, name in sorted(zip(self.score_batch(names), names), key=lambda p: -p[0])]
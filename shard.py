@@ -0,0 +1,351 @@
+"""Шардированная проверка 4/5-символьных имен несколькими процессами или машинами.
+
+Координатор делит пространство перебора (позиции KeyspaceEnumerator) на
+непересекающиеся диапазоны и раздает их воркерам по TCP (JSON-строки).
+Воркер проверяет свой диапазон порциями и после каждой порции отправляет
+результаты вместе с позицией, до которой диапазон пройден. Если воркер
+отвалился, его диапазон с этой позиции возвращается в очередь.
+
+    python -m shard coordinator --category 4char --local-workers 4 --output hits.jsonl
+    python -m shard worker --host 10.0.0.5 --port 9100 --threads 15
+"""
+import argparse
+import concurrent.futures
+import json
+import logging
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from keyspace import KeyspaceEnumerator
+
+CATEGORY_LENGTHS = {"4char": 4, "5char": 5}
+
+logger = logging.getLogger("shard")
+
+
+def send_message(stream, message: Dict, lock: Optional[threading.Lock] = None):
+    data = json.dumps(message, ensure_ascii=False) + "\n"
+    if lock is None:
+        stream.write(data)
+        stream.flush()
+    else:
+        with lock:
+            stream.write(data)
+            stream.flush()
+
+
+class ShardCoordinator:
+    """Раздает диапазоны позиций воркерам и собирает их результаты"""
+
+    def __init__(self, length: int, shard_size: int = 5000, seed: Optional[int] = None,
+                 host: str = "0.0.0.0", port: int = 9100, heartbeat_timeout: float = 60.0,
+                 on_result: Optional[Callable[[Dict], None]] = None):
+        self.enumerator = KeyspaceEnumerator(length, seed=seed)
+        self.length = length
+        self.seed = self.enumerator.seed
+        self.host = host
+        self.port = port
+        self.heartbeat_timeout = heartbeat_timeout
+        self.on_result = on_result
+
+        # Шард: [текущая позиция, конец]; позиция сдвигается по мере прогресса
+        self.shards: Dict[int, List[int]] = {}
+        for shard_id, start in enumerate(range(0, self.enumerator.size, shard_size)):
+            self.shards[shard_id] = [start, min(start + shard_size, self.enumerator.size)]
+        self.pending: Deque[int] = deque(self.shards)
+        self.assigned: Dict[int, str] = {}
+        self.done: Set[int] = set()
+
+        self.total_checked = 0
+        self.total_found = 0
+        self.total_errors = 0
+        self.worker_checked: Dict[str, int] = {}
+        self.reassigned = 0
+
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.server: Optional[socketserver.ThreadingTCPServer] = None
+
+    def assign(self, worker: str) -> Dict:
+        """Следующее задание для воркера"""
+        with self.lock:
+            if self.pending:
+                shard_id = self.pending.popleft()
+                self.assigned[shard_id] = worker
+                start, stop = self.shards[shard_id]
+                return {'type': 'shard', 'shard': shard_id, 'length': self.length,
+                        'seed': self.seed, 'start': start, 'stop': stop}
+            if self.assigned:
+                # Свободных шардов нет, но чужие могут вернуться в очередь
+                return {'type': 'wait', 'delay': 2.0}
+            return {'type': 'done'}
+
+    def report(self, worker: str, shard_id: int, position: int, results: List[Dict]):
+        """Результаты порции шарда; от воркера, потерявшего шард, игнорируются"""
+        with self.lock:
+            if self.assigned.get(shard_id) != worker:
+                return
+            self.shards[shard_id][0] = position
+            self.worker_checked[worker] = self.worker_checked.get(worker, 0) + len(results)
+            for result in results:
+                self.total_checked += 1
+                if result['available']:
+                    self.total_found += 1
+                if not result['success']:
+                    self.total_errors += 1
+                if self.on_result:
+                    self.on_result(result)
+
+    def complete(self, worker: str, shard_id: int):
+        with self.lock:
+            if self.assigned.get(shard_id) != worker:
+                return
+            del self.assigned[shard_id]
+            self.done.add(shard_id)
+            if len(self.done) == len(self.shards):
+                self.finished.set()
+
+    def release_worker(self, worker: str):
+        """Возвращает в очередь все незавершенные шарды воркера"""
+        with self.lock:
+            lost = [shard_id for shard_id, owner in self.assigned.items() if owner == worker]
+            for shard_id in lost:
+                del self.assigned[shard_id]
+                self.pending.appendleft(shard_id)
+                self.reassigned += 1
+        if lost:
+            logger.warning("⚠️ Воркер %s отключился, возвращено шардов: %d", worker, len(lost))
+
+    def progress(self) -> str:
+        with self.lock:
+            return (f"📦 Шарды: {len(self.done)}/{len(self.shards)} готово, {len(self.assigned)} в работе | "
+                    f"📊 Проверено: {self.total_checked} | 🎯 Найдено: {self.total_found} | "
+                    f"❌ Ошибок: {self.total_errors} | 👷 Воркеров: {len(self.worker_checked)}")
+
+    def start(self):
+        """Запускает TCP-сервер координатора в фоне"""
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.connection.settimeout(coordinator.heartbeat_timeout)
+                reader = self.rfile
+                writer = self.wfile
+                worker = f"{self.client_address[0]}:{self.client_address[1]}"
+                try:
+                    for raw in reader:
+                        message = json.loads(raw)
+                        kind = message.get('type')
+                        if kind == 'hello':
+                            worker = message.get('worker') or worker
+                        elif kind == 'next':
+                            reply = json.dumps(coordinator.assign(worker)) + "\n"
+                            writer.write(reply.encode('utf-8'))
+                            writer.flush()
+                        elif kind == 'results':
+                            coordinator.report(worker, message['shard'], message['position'], message['results'])
+                        elif kind == 'shard_done':
+                            coordinator.complete(worker, message['shard'])
+                except (OSError, ValueError):
+                    pass
+                finally:
+                    coordinator.release_worker(worker)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, name="shard-coordinator", daemon=True).start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def run_worker(host: str, port: int, threads: int = 15, rate: float = 0,
+               base_url: str = "https://fragment.com", chunk_size: int = 100,
+               heartbeat_interval: float = 10.0, name: Optional[str] = None):
+    """Воркер: берет шарды у координатора, пока они не закончатся"""
+    from parser import FragmentParser
+    from pipeline import RetryQueue
+    from ratelimit import TokenBucket
+    from results import is_transient
+
+    fragment = FragmentParser(base_url=base_url, pool_size=threads)
+    fragment.warm_up()
+    bucket = TokenBucket(rate)
+    retries = RetryQueue()
+    stop_event = threading.Event()
+    # Retry-After от сервера приостанавливает все проверки воркера
+    pause_lock = threading.Lock()
+    paused_until = 0.0
+
+    def check(username: str):
+        nonlocal paused_until
+        delay = paused_until - time.monotonic()
+        if delay > 0:
+            stop_event.wait(delay)
+        bucket.acquire(stop_event)
+        result = fragment.check_username_status(username, stop_event)
+        if result.retry_after:
+            with pause_lock:
+                paused_until = max(paused_until, time.monotonic() + result.retry_after)
+        return result
+
+    def check_chunk(executor: concurrent.futures.Executor, names: List[str]) -> List[Dict]:
+        """Проверяет порцию имен. Временные ошибки (таймауты, 429, 5xx) повторяются
+        с отступом до исчерпания попыток - позиция шарда не уходит дальше непроверенных имен"""
+        final = {}
+        pending = names
+        while pending:
+            for result in executor.map(check, pending):
+                if is_transient(result) and retries.schedule(result.username, result.retry_after):
+                    continue
+                retries.done(result.username)
+                final[result.username] = result
+            pending = []
+            while len(retries) and not pending:
+                username = retries.pop_due()
+                while username is not None:
+                    pending.append(username)
+                    username = retries.pop_due()
+                if not pending:
+                    time.sleep(0.05)
+        return [final[username].to_dict() for username in names]
+
+    sock = socket.create_connection((host, port))
+    stream = sock.makefile('rw', encoding='utf-8')
+    send_lock = threading.Lock()
+    name = name or f"{socket.gethostname()}-{id(sock):x}"
+
+    def heartbeat():
+        while not stop_event.wait(heartbeat_interval):
+            try:
+                send_message(stream, {'type': 'heartbeat'}, send_lock)
+            except OSError:
+                return
+
+    send_message(stream, {'type': 'hello', 'worker': name}, send_lock)
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            while True:
+                send_message(stream, {'type': 'next'}, send_lock)
+                line = stream.readline()
+                if not line:
+                    break
+                task = json.loads(line)
+                if task['type'] == 'done':
+                    break
+                if task['type'] == 'wait':
+                    time.sleep(task['delay'])
+                    continue
+
+                enumerator = KeyspaceEnumerator(task['length'], seed=task['seed'])
+                for position in range(task['start'], task['stop'], chunk_size):
+                    end = min(position + chunk_size, task['stop'])
+                    names = [enumerator.name_at(p) for p in range(position, end)]
+                    send_message(stream, {'type': 'results', 'shard': task['shard'], 'position': end,
+                                          'results': check_chunk(executor, names)}, send_lock)
+                send_message(stream, {'type': 'shard_done', 'shard': task['shard']}, send_lock)
+    finally:
+        stop_event.set()
+        stream.close()
+        sock.close()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m shard",
+                                     description="Шардированная проверка юзернеймов")
+    sub = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = sub.add_parser("coordinator", help="раздавать шарды и собирать результаты")
+    coordinator.add_argument("--category", choices=sorted(CATEGORY_LENGTHS), default="4char")
+    coordinator.add_argument("--host", default="0.0.0.0")
+    coordinator.add_argument("--port", type=int, default=9100)
+    coordinator.add_argument("--shard-size", type=int, default=5000)
+    coordinator.add_argument("--seed", type=int, default=None,
+                             help="зерно порядка перебора (для повторяемости)")
+    coordinator.add_argument("--local-workers", type=int, default=0,
+                             help="сколько воркеров запустить локально отдельными процессами")
+    coordinator.add_argument("--threads", type=int, default=15, help="потоков у локальных воркеров")
+    coordinator.add_argument("--rate", type=float, default=0, help="лимит проверок/сек на локального воркера")
+    coordinator.add_argument("--base-url", default="https://fragment.com")
+    coordinator.add_argument("--output", default=None, help="JSONL/CSV-файл для свободных имен")
+    coordinator.add_argument("--stats-interval", type=float, default=10)
+    coordinator.add_argument("--log-level", default="INFO")
+
+    worker = sub.add_parser("worker", help="проверять шарды координатора")
+    worker.add_argument("--host", default="127.0.0.1")
+    worker.add_argument("--port", type=int, default=9100)
+    worker.add_argument("--threads", type=int, default=15)
+    worker.add_argument("--rate", type=float, default=0)
+    worker.add_argument("--base-url", default="https://fragment.com")
+    worker.add_argument("--name", default=None)
+    worker.add_argument("--log-level", default="WARNING")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+
+    from logs import setup_logging
+    setup_logging(args.log_level)
+
+    if args.role == "worker":
+        run_worker(args.host, args.port, threads=args.threads, rate=args.rate,
+                   base_url=args.base_url, name=args.name)
+        return 0
+
+    output = None
+    if args.output:
+        from sink import ResultSink
+        output = ResultSink(args.output)
+
+    def on_result(result: Dict):
+        if output:
+            output.write(result)
+
+    coordinator = ShardCoordinator(CATEGORY_LENGTHS[args.category], shard_size=args.shard_size,
+                                   seed=args.seed, host=args.host, port=args.port, on_result=on_result)
+    coordinator.start()
+    logger.info("🧭 Координатор на порту %d: %d шардов, зерно %s",
+                coordinator.port, len(coordinator.shards), coordinator.seed)
+
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "shard", "worker",
+                          "--host", "127.0.0.1", "--port", str(coordinator.port),
+                          "--threads", str(args.threads), "--rate", str(args.rate),
+                          "--base-url", args.base_url, "--name", f"local-{i}"])
+        for i in range(args.local_workers)
+    ]
+
+    try:
+        while not coordinator.finished.wait(args.stats_interval):
+            logger.info("%s", coordinator.progress())
+            if output:
+                output.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        coordinator.stop()
+        if output:
+            output.close()
+
+    logger.info("%s", coordinator.progress())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
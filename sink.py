@@ -0,0 +1,139 @@
+"""Потоковая запись результатов в файл по мере их поступления.
+
+Результаты дописываются в конец файла (JSONL или CSV), копятся в буфере
+и сбрасываются на диск порциями; раз в fsync_interval секунд данные
+принудительно доводятся до диска, поэтому падение процесса теряет не
+больше нескольких секунд работы. При превышении max_bytes файл
+переименовывается в name.1 (name.1 -> name.2 и т.д.) и начинается новый.
+Имя '-' означает stdout (без fsync и ротации).
+"""
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from results import as_dict
+
+CSV_FIELDS = ('username', 'status', 'available', 'success', 'response_time', 'reason', 'url')
+
+
+class ResultSink:
+    """Дописывает результаты проверок в JSONL/CSV с буфером, fsync и ротацией"""
+
+    def __init__(self, filename: str, fmt: Optional[str] = None, only_available: bool = True,
+                 buffer_size: int = 64 * 1024, fsync_interval: float = 5.0,
+                 max_bytes: int = 100 * 1024 * 1024, backup_count: int = 5):
+        self.filename = filename
+        # Формат по расширению: .csv - CSV, все остальное - JSONL
+        self.fmt = fmt or ('csv' if filename.lower().endswith('.csv') else 'jsonl')
+        if self.fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"Неизвестный формат: {self.fmt}")
+        self.only_available = only_available
+        self.buffer_size = buffer_size
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+        self.buffer: List[str] = []
+        self.buffered = 0
+        self.written = 0
+        self.last_sync = time.monotonic()
+        self.lock = threading.Lock()
+        self.file = None
+        self._open()
+
+    @property
+    def is_stdout(self) -> bool:
+        return self.filename == '-'
+
+    def _open(self):
+        if self.is_stdout:
+            self.file = sys.stdout
+            self.size = 0
+        else:
+            self.file = open(self.filename, 'a', encoding='utf-8', newline='')
+            self.size = self.file.tell()
+        if self.fmt == 'csv' and self.size == 0:
+            self.buffer.append(self._csv_line(dict(zip(CSV_FIELDS, CSV_FIELDS))))
+            self.buffered += len(self.buffer[-1])
+
+    @staticmethod
+    def _csv_line(row: Dict) -> str:
+        out = io.StringIO()
+        csv.writer(out).writerow([row.get(field, '') for field in CSV_FIELDS])
+        return out.getvalue()
+
+    def _format(self, result: Dict) -> str:
+        if self.fmt == 'csv':
+            return self._csv_line(result)
+        return json.dumps(as_dict(result), ensure_ascii=False) + "\n"
+
+    def write(self, result: Dict):
+        """Добавляет результат (свободные имена или все, смотря по only_available)"""
+        if self.only_available and not result['available']:
+            return
+        line = self._format(result)
+        with self.lock:
+            self.buffer.append(line)
+            self.buffered += len(line)
+            self.written += 1
+            if self.buffered >= self.buffer_size:
+                self._flush_locked(sync=False)
+            if time.monotonic() - self.last_sync >= self.fsync_interval:
+                self._flush_locked(sync=True)
+
+    def flush(self, sync: bool = True):
+        """Сбрасывает буфер в файл; sync=True дополнительно делает fsync"""
+        with self.lock:
+            self._flush_locked(sync)
+
+    def _flush_locked(self, sync: bool):
+        if self.file is None:
+            return
+        if self.buffer:
+            data = ''.join(self.buffer)
+            self.buffer = []
+            self.buffered = 0
+            size = len(data.encode('utf-8'))
+            if self.max_bytes and not self.is_stdout and self.size and self.size + size > self.max_bytes:
+                self._rotate()
+                if self.fmt == 'csv':
+                    # В новом файле заголовок уже стоит в буфере
+                    size += self.buffered
+                    data = ''.join(self.buffer) + data
+                    self.buffer = []
+                    self.buffered = 0
+            self.file.write(data)
+            self.size += size
+        self.file.flush()
+        if sync:
+            if not self.is_stdout:
+                os.fsync(self.file.fileno())
+            self.last_sync = time.monotonic()
+
+    def _rotate(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.filename}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.filename}.{i + 1}")
+            os.replace(self.filename, f"{self.filename}.1")
+        else:
+            os.remove(self.filename)
+        self._open()
+
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+            self._flush_locked(sync=True)
+            if not self.is_stdout:
+                self.file.close()
+            self.file = None
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+
+class ResultStore:
+    """Хранилище результатов проверок в SQLite (режим WAL, пакетная запись).
+
+    Для каждого юзернейма хранится последний результат. Имена, успешно
+    проверенные не раньше ttl секунд назад, считаются свежими и пропускаются.
+    """
+
+    def __init__(self, filename: str = "results.db", ttl: float = 24 * 3600,
+                 batch_size: int = 200, flush_interval: float = 2.0):
+        self.filename = filename
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.lock = threading.Lock()
+        self.pending: List[tuple] = []
+        self.last_flush = time.monotonic()
+
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS checks (
+                username TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                available INTEGER NOT NULL,
+                success INTEGER NOT NULL,
+                checked_at REAL NOT NULL,
+                response_time REAL NOT NULL
+            )
+        """)
+        self.conn.commit()
+
+    def record(self, result: Dict):
+        """Добавляет результат в буфер; запись на диск - пачками"""
+        row = (
+            result['username'],
+            result['status'],
+            int(result['available']),
+            int(result['success']),
+            time.time(),
+            float(result.get('response_time', 0)),
+        )
+        with self.lock:
+            self.pending.append(row)
+            if (len(self.pending) >= self.batch_size
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        """Принудительно записывает буфер"""
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self.pending:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO checks "
+                "(username, status, available, success, checked_at, response_time) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self.pending,
+            )
+            self.conn.commit()
+            self.pending = []
+        self.last_flush = time.monotonic()
+
+    def filter_unchecked(self, usernames: Iterable[str]) -> List[str]:
+        """Оставляет только имена без свежего успешного результата"""
+        usernames = list(usernames)
+        if not usernames:
+            return usernames
+
+        cutoff = time.time() - self.ttl
+        fresh = set()
+        with self.lock:
+            fresh.update(row[0] for row in self.pending if row[3] and row[4] >= cutoff)
+            for i in range(0, len(usernames), 500):
+                chunk = usernames[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = self.conn.execute(
+                    f"SELECT username FROM checks WHERE success = 1 AND checked_at >= ? "
+                    f"AND username IN ({placeholders})",
+                    [cutoff, *chunk],
+                )
+                fresh.update(row[0] for row in cursor)
+
+        return [username for username in usernames if username not in fresh]
+
+    def was_checked_recently(self, username: str) -> bool:
+        return not self.filter_unchecked([username])
+
+    def get(self, username: str) -> Optional[Dict]:
+        """Последний сохраненный результат для юзернейма"""
+        self.flush()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT username, status, available, success, checked_at, response_time "
+                "FROM checks WHERE username = ?",
+                (username,),
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def available_usernames(self) -> List[Dict]:
+        """Все юзернеймы, которые при последней проверке были свободны"""
+        self.flush()
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT username, status, available, success, checked_at, response_time "
+                "FROM checks WHERE available = 1 ORDER BY checked_at"
+            ).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    @staticmethod
+    def _row_to_dict(row: tuple) -> Dict:
+        return {
+            'username': row[0],
+            'status': row[1],
+            'available': bool(row[2]),
+            'success': bool(row[3]),
+            'checked_at': row[4],
+            'response_time': row[5],
+        }
+
+    def close(self):
+        with self.lock:
+            self._flush_locked()
+            self.conn.close()
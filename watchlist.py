@@ -0,0 +1,272 @@
+"""Наблюдение за занятыми именами: периодические перепроверки и смены статуса.
+
+Watchlist хранит имена со своим интервалом перепроверки в куче по времени
+следующей проверки (устаревшие записи кучи отбрасываются лениво).
+WatchMonitor раздает созревшие имена воркерам в пределах общего темпа
+(TokenBucket) и сообщает только о переходах Taken -> Available и обратно;
+первая проверка имени лишь запоминает его статус.
+
+Файл списка - строки "имя[<TAB>интервал[<TAB>статус[<TAB>время следующей проверки]]]",
+так что обычный список имен по одному на строку тоже подходит.
+"""
+import heapq
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from metrics import METRICS
+from parser import FragmentParser
+from ratelimit import TokenBucket
+from results import CANCELLED
+
+logger = logging.getLogger(__name__)
+
+Transition = Callable[[str, Optional[bool], bool, Dict], None]
+
+
+class WatchEntry:
+    """Состояние одного наблюдаемого имени"""
+
+    __slots__ = ('interval', 'due', 'available')
+
+    def __init__(self, interval: float, due: float, available: Optional[bool] = None):
+        self.interval = interval
+        self.due = due
+        # None - статус еще не известен
+        self.available = available
+
+
+class Watchlist:
+    """Имена с индивидуальными интервалами в куче по времени следующей проверки"""
+
+    def __init__(self, default_interval: float = 3600.0):
+        self.default_interval = default_interval
+        self.entries: Dict[str, WatchEntry] = {}
+        self.heap: List[Tuple[float, str]] = []
+        self.lock = threading.Lock()
+
+    def add(self, username: str, interval: Optional[float] = None, spread: bool = True,
+            available: Optional[bool] = None, due: Optional[float] = None):
+        """Добавляет имя (или меняет интервал). spread - первая проверка в случайный
+        момент интервала, чтобы большой список не созревал одной пачкой"""
+        with self.lock:
+            entry = self.entries.get(username)
+            if interval is None:
+                interval = entry.interval if entry is not None else self.default_interval
+            if due is None:
+                due = time.time() + (random.uniform(0, interval) if spread else 0)
+            if entry is not None:
+                entry.interval = interval
+                if available is not None:
+                    entry.available = available
+                if due >= entry.due:
+                    return
+                entry.due = due
+            else:
+                self.entries[username] = WatchEntry(interval, due, available)
+            heapq.heappush(self.heap, (due, username))
+
+    def remove(self, username: str):
+        # Запись в куче останется и будет пропущена при извлечении
+        with self.lock:
+            self.entries.pop(username, None)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self.entries
+
+    def pop_due(self, now: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """Созревшее имя и на сколько секунд оно опоздало, или None"""
+        now = time.time() if now is None else now
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                due, username = heapq.heappop(self.heap)
+                entry = self.entries.get(username)
+                if entry is None or entry.due != due:
+                    continue
+                # Пока идет проверка, имя не должно выдаваться повторно
+                entry.due = float('inf')
+                return username, now - due
+            return None
+
+    def next_due_in(self, now: Optional[float] = None) -> Optional[float]:
+        """Через сколько секунд созреет ближайшее имя (None - список пуст)"""
+        now = time.time() if now is None else now
+        with self.lock:
+            while self.heap:
+                due, username = self.heap[0]
+                entry = self.entries.get(username)
+                if entry is None or entry.due != due:
+                    heapq.heappop(self.heap)
+                    continue
+                return max(0.0, due - now)
+            return None
+
+    def backlog(self, now: Optional[float] = None) -> int:
+        """Сколько имен уже созрело и ждет проверки.
+
+        Обходит только вершину кучи с due <= now (потомки не раньше предка),
+        устаревшие записи не считаются.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            count = 0
+            stack = [0] if self.heap else []
+            while stack:
+                i = stack.pop()
+                due, username = self.heap[i]
+                if due > now:
+                    continue
+                entry = self.entries.get(username)
+                if entry is not None and entry.due == due:
+                    count += 1
+                stack.extend(child for child in (2 * i + 1, 2 * i + 2) if child < len(self.heap))
+            return count
+
+    def complete(self, username: str, available: Optional[bool],
+                 delay: Optional[float] = None) -> Optional[bool]:
+        """Фиксирует проверку и планирует следующую. Возвращает прежний статус"""
+        with self.lock:
+            entry = self.entries.get(username)
+            if entry is None:
+                return None
+            previous = entry.available
+            if available is not None:
+                entry.available = available
+            entry.due = time.time() + (delay if delay is not None else entry.interval)
+            heapq.heappush(self.heap, (entry.due, username))
+            return previous
+
+    def save(self, filename: str):
+        """Сохраняет список атомарно: сбой посреди записи не портит прежний файл"""
+        with self.lock:
+            items = list(self.entries.items())
+        now = time.time()
+        tmp_path = filename + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for username, entry in items:
+                status = '-' if entry.available is None else ('1' if entry.available else '0')
+                due = entry.due if entry.due != float('inf') else now
+                f.write(f"{username}\t{entry.interval:g}\t{status}\t{due:.0f}\n")
+        os.replace(tmp_path, filename)
+
+    def load(self, filename: str):
+        """Добавляет имена из файла (формат save или просто имена по строкам)"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.split('#', 1)[0].split()
+                if not parts:
+                    continue
+                interval = float(parts[1]) if len(parts) > 1 else None
+                available = {'1': True, '0': False}.get(parts[2]) if len(parts) > 2 else None
+                due = float(parts[3]) if len(parts) > 3 else None
+                self.add(parts[0].lower(), interval, available=available, due=due)
+
+    def extend(self, usernames: Iterable[str], interval: Optional[float] = None):
+        for username in usernames:
+            self.add(username, interval)
+
+
+class WatchMonitor:
+    """Перепроверяет созревшие имена в пределах rate проверок/сек и сообщает о сменах статуса"""
+
+    def __init__(self, parser: FragmentParser, watchlist: Watchlist, rate: float = 1.0,
+                 workers: int = 10, error_retry: float = 60.0,
+                 on_transition: Optional[Transition] = None,
+                 on_result: Optional[Callable[[Dict], None]] = None):
+        self.parser = parser
+        self.watchlist = watchlist
+        self.bucket = TokenBucket(rate)
+        self.workers = workers
+        # После ошибки имя проверяется снова раньше своего интервала
+        self.error_retry = error_retry
+        self.on_transition = on_transition
+        self.on_result = on_result
+
+        self.stop_event = threading.Event()
+        self.threads: List[threading.Thread] = []
+        self.lock = threading.Lock()
+        self.total_checked = 0
+        self.total_errors = 0
+        self.total_transitions = 0
+
+    def start(self):
+        self.stop_event.clear()
+        self.parser.ensure_pool_size(self.workers)
+        self.threads = [
+            threading.Thread(target=self._work, name=f"watch-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+        METRICS.register_gauge('watchlist_size', lambda: len(self.watchlist))
+
+    def stop(self):
+        self.stop_event.set()
+        METRICS.unregister_gauge('watchlist_size')
+
+    def join(self, timeout: Optional[float] = None):
+        """Ждет потоки не дольше timeout секунд на все вместе"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self.threads:
+            thread.join(max(0.0, deadline - time.monotonic()) if deadline is not None else None)
+
+    def set_rate(self, rate: float):
+        self.bucket.set_rate(rate)
+
+    @property
+    def finished(self) -> bool:
+        """Наблюдать больше нечего"""
+        return bool(self.threads) and not len(self.watchlist)
+
+    def _work(self):
+        while not self.stop_event.is_set():
+            # Сначала созревшее имя, потом токен: токен не простаивает у воркера,
+            # которому нечего проверять, и созревшие имена не уходят пачкой
+            item = self.watchlist.pop_due()
+            while item is None:
+                wait = self.watchlist.next_due_in()
+                if self.stop_event.wait(min(1.0, wait if wait is not None else 1.0)):
+                    return
+                item = self.watchlist.pop_due()
+            username, lag = item
+            started = time.monotonic()
+            if not self.bucket.acquire(self.stop_event):
+                # Остановка в ожидании токена - имя возвращается в очередь
+                self.watchlist.complete(username, None, delay=0)
+                return
+            METRICS.observe('watchlist_lag_seconds', lag + time.monotonic() - started)
+            self._check(username)
+
+    def _check(self, username: str):
+        result = self.parser.check_username_status(username, self.stop_event)
+        if result['status'] == CANCELLED:
+            # Остановка во время ожидания слота - имя проверится при следующем запуске
+            self.watchlist.complete(username, None, delay=0)
+            return
+        with self.lock:
+            self.total_checked += 1
+        if not result['success']:
+            with self.lock:
+                self.total_errors += 1
+            delay = max(self.error_retry, result.get('retry_after') or 0)
+            self.watchlist.complete(username, None, delay=delay)
+            return
+
+        available = result['available']
+        previous = self.watchlist.complete(username, available)
+        if self.on_result:
+            self.on_result(result)
+        if previous is not None and previous != available:
+            with self.lock:
+                self.total_transitions += 1
+            METRICS.inc('watchlist_transitions_total', labels={'to': 'available' if available else 'taken'})
+            logger.info("🔔 %s: %s -> %s", username,
+                        'Available' if previous else 'Taken', 'Available' if available else 'Taken')
+            if self.on_transition:
+                self.on_transition(username, previous, available, result)
@@ -0,0 +1,228 @@
+"""Индекс словаря для категории "english" в компактном файле, читаемом через mmap.
+
+Слова из внешнего списка один раз нормализуются (нижний регистр, только
+допустимые в Telegram символы), раскладываются по длинам и сортируются.
+В файле каждая длина - отдельная секция записей фиксированной ширины,
+поэтому i-е слово длины L лежит по адресу offset + i * L, а поиск по
+префиксу - двоичный поиск прямо по отображенному файлу. В память Python
+попадают только те слова, которые реально выдаются генератору.
+
+    python -m wordindex words.txt words.idx
+"""
+import mmap
+import os
+import re
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'TGWIDX01'
+SECTION = struct.Struct('<IIQ')  # длина слова, число слов, смещение секции
+COUNT = struct.Struct('<I')
+
+MIN_LENGTH = 4
+MAX_LENGTH = 32
+# Юзернейм Telegram: латиница, цифры и _, начинается с буквы, без _ в конце и __
+VALID_WORD = re.compile(r'[a-z][a-z0-9_]*')
+
+
+def normalize(word: str) -> Optional[str]:
+    """Слово в виде юзернейма или None, если оно недопустимо"""
+    word = word.strip().lower()
+    if not MIN_LENGTH <= len(word) <= MAX_LENGTH:
+        return None
+    if not VALID_WORD.fullmatch(word) or word.endswith('_') or '__' in word:
+        return None
+    return word
+
+
+def build_index(wordlist: str, index_path: str) -> Dict[int, int]:
+    """Строит файл индекса из списка слов (по одному на строку). Возвращает {длина: число слов}"""
+    by_length: Dict[int, set] = {}
+    with open(wordlist, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            word = normalize(line)
+            if word is not None:
+                by_length.setdefault(len(word), set()).add(word)
+
+    lengths = sorted(by_length)
+    offset = len(MAGIC) + COUNT.size + SECTION.size * len(lengths)
+    sections = []
+    for length in lengths:
+        sections.append((length, len(by_length[length]), offset))
+        offset += length * len(by_length[length])
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(COUNT.pack(len(sections)))
+        for section in sections:
+            f.write(SECTION.pack(*section))
+        for length in lengths:
+            f.write(''.join(sorted(by_length[length])).encode('ascii'))
+    os.replace(tmp_path, index_path)
+    return {length: len(words) for length, words in by_length.items()}
+
+
+def open_wordlist(path: str) -> 'WordIndex':
+    """Открывает индекс; для текстового списка строит (или обновляет) path + '.idx'"""
+    if path.endswith('.idx'):
+        return WordIndex(path)
+    index_path = path + '.idx'
+    if not os.path.exists(index_path) or os.path.getmtime(index_path) < os.path.getmtime(path):
+        build_index(path, index_path)
+    return WordIndex(index_path)
+
+
+class WordIndex:
+    """Только чтение: секции слов по длинам поверх mmap"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path}: не файл индекса слов")
+
+        (sections,) = COUNT.unpack_from(self.data, len(MAGIC))
+        self.sections: Dict[int, Tuple[int, int]] = {}
+        position = len(MAGIC) + COUNT.size
+        for _ in range(sections):
+            length, count, offset = SECTION.unpack_from(self.data, position)
+            self.sections[length] = (count, offset)
+            position += SECTION.size
+
+    def lengths(self) -> List[int]:
+        return sorted(self.sections)
+
+    def count(self, length: int) -> int:
+        return self.sections.get(length, (0, 0))[0]
+
+    def __len__(self) -> int:
+        return sum(count for count, _ in self.sections.values())
+
+    def _record(self, length: int, position: int) -> bytes:
+        offset = self.sections[length][1] + position * length
+        return self.data[offset:offset + length]
+
+    def word(self, length: int, position: int) -> str:
+        return self._record(length, position).decode('ascii')
+
+    def prefix_range(self, length: int, prefix: str = '') -> Tuple[int, int]:
+        """Диапазон позиций [lo, hi) слов длины length с данным префиксом"""
+        count = self.count(length)
+        if not prefix:
+            return 0, count
+        key = prefix.encode('ascii')
+        size = len(key)
+
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(length, mid)[:size] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = lo
+        hi = count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(length, mid)[:size] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return start, lo
+
+    def __contains__(self, word: str) -> bool:
+        length = len(word)
+        if length not in self.sections:
+            return False
+        lo, hi = self.prefix_range(length, word)
+        return hi > lo
+
+    def iter_words(self, lengths: Optional[Iterable[int]] = None, prefix: str = '') -> Iterator[str]:
+        """Ленивый обход слов нужных длин (по возрастанию длины, внутри - по алфавиту)"""
+        for length in (sorted(lengths) if lengths is not None else self.lengths()):
+            if length not in self.sections:
+                continue
+            lo, hi = self.prefix_range(length, prefix)
+            for position in range(lo, hi):
+                yield self.word(length, position)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+class WordCursor:
+    """Позиция обхода индекса с фильтрами; состояние можно сохранить и продолжить"""
+
+    def __init__(self, index: WordIndex, lengths: Iterable[int] = range(4, 9), prefix: str = '',
+                 length_pos: int = 0, position: Optional[int] = None):
+        self.index = index
+        self.lengths = [length for length in sorted(set(lengths)) if index.count(length)]
+        self.prefix = prefix.lower()
+        self.length_pos = length_pos
+        self.position = position
+        self.stop = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.length_pos >= len(self.lengths)
+
+    def _enter_length(self):
+        lo, hi = self.index.prefix_range(self.lengths[self.length_pos], self.prefix)
+        if self.position is None or self.position < lo:
+            self.position = lo
+        self.stop = hi
+
+    def next_batch(self, count: int, positions: Optional[List[Tuple[int, int]]] = None) -> List[str]:
+        """Следующие count слов; в positions (если передан) - (length_pos, position) каждого"""
+        words = []
+        while len(words) < count and not self.exhausted:
+            self._enter_length()
+            length = self.lengths[self.length_pos]
+            end = min(self.stop, self.position + count - len(words))
+            words.extend(self.index.word(length, p) for p in range(self.position, end))
+            if positions is not None:
+                positions.extend((self.length_pos, p) for p in range(self.position, end))
+            self.position = end
+            if self.position >= self.stop:
+                self.length_pos += 1
+                self.position = None
+        return words
+
+    def remaining(self) -> int:
+        total = 0
+        for i in range(self.length_pos, len(self.lengths)):
+            lo, hi = self.index.prefix_range(self.lengths[i], self.prefix)
+            if i == self.length_pos and self.position is not None:
+                lo = max(lo, self.position)
+            total += max(0, hi - lo)
+        return total
+
+    def state(self) -> Dict:
+        return {'index': self.index.path, 'lengths': self.lengths, 'prefix': self.prefix,
+                'length_pos': self.length_pos, 'position': self.position}
+
+    @classmethod
+    def from_state(cls, state: Dict, index: Optional[WordIndex] = None) -> 'WordCursor':
+        index = index or WordIndex(state['index'])
+        return cls(index, state['lengths'], state['prefix'],
+                   length_pos=state['length_pos'], position=state['position'])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Использование: python -m wordindex СПИСОК_СЛОВ.txt ИНДЕКС.idx", file=sys.stderr)
+        return 2
+    counts = build_index(argv[0], argv[1])
+    print(f"📚 {sum(counts.values())} слов, длины {min(counts, default=0)}-{max(counts, default=0)} -> {argv[1]}",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())